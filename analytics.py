@@ -0,0 +1,266 @@
+"""
+Usage Analytics
+Incrementally updated consultation statistics (counters + streaming quantile sketches)
+and a columnar export of the history for offline analysis
+"""
+
+import json
+import math
+import os
+import threading
+from pathlib import Path
+
+from model_router import normalize_specialist
+from history_store import parse_timestamp
+from file_lock import file_lock
+
+STATS_FILE = Path("consult_stats.json")
+STATS_LOCK_FILE = STATS_FILE.with_suffix(".lock")
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch style): every quantile it reports
+    is within `relative_accuracy` of the true value, memory grows with the
+    log of the value range rather than the number of samples.
+    """
+
+    def __init__(self, relative_accuracy=0.02):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self._gamma ** key / (self._gamma + 1)
+        return 2 * self._gamma ** max(self.buckets) / (self._gamma + 1)
+
+    def to_dict(self):
+        return {"relative_accuracy": self.relative_accuracy, "zeros": self.zeros,
+                "count": self.count, "buckets": {str(k): v for k, v in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data.get("relative_accuracy", 0.02))
+        sketch.zeros = data.get("zeros", 0)
+        sketch.count = data.get("count", 0)
+        sketch.buckets = {int(k): v for k, v in data.get("buckets", {}).items()}
+        return sketch
+
+
+class UsageStats:
+    """Running aggregates updated once per consultation; never rescans history"""
+
+    def __init__(self):
+        self.total = 0
+        self.by_specialist = {}
+        self.by_day = {}
+        self.answer_chars = 0
+        self.answer_sketch = QuantileSketch()
+        self.latency_sketch = QuantileSketch()
+
+    def record(self, entry: dict):
+        self.total += 1
+        spec = normalize_specialist(entry.get("specialist", "")) or "Unknown"
+        self.by_specialist[spec] = self.by_specialist.get(spec, 0) + 1
+        day = entry.get("timestamp", "")[:10]
+        if day:
+            self.by_day[day] = self.by_day.get(day, 0) + 1
+        length = len(entry.get("result", ""))
+        self.answer_chars += length
+        self.answer_sketch.add(length)
+        latency = entry.get("latency_ms")
+        if latency is not None:
+            self.latency_sketch.add(latency)
+
+    def summary(self) -> dict:
+        return {
+            "total": self.total,
+            "by_specialist": dict(sorted(self.by_specialist.items(), key=lambda kv: -kv[1])),
+            "last_7_days": dict(sorted(self.by_day.items())[-7:]),
+            "answer_chars_mean": self.answer_chars / self.total if self.total else 0,
+            "answer_chars_p50": self.answer_sketch.quantile(0.5),
+            "latency_ms": {f"p{int(q * 100)}": self.latency_sketch.quantile(q) for q in (0.5, 0.9, 0.99)},
+            "latency_samples": self.latency_sketch.count,
+        }
+
+    def to_dict(self):
+        return {"total": self.total, "by_specialist": self.by_specialist, "by_day": self.by_day,
+                "answer_chars": self.answer_chars, "answer_sketch": self.answer_sketch.to_dict(),
+                "latency_sketch": self.latency_sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.total = data.get("total", 0)
+        stats.by_specialist = data.get("by_specialist", {})
+        stats.by_day = data.get("by_day", {})
+        stats.answer_chars = data.get("answer_chars", 0)
+        stats.answer_sketch = QuantileSketch.from_dict(data.get("answer_sketch", {}))
+        stats.latency_sketch = QuantileSketch.from_dict(data.get("latency_sketch", {}))
+        return stats
+
+
+# ---------------------------
+# Persistence (one small JSON file, updated per consultation; the file is the
+# source of truth, so every GUI window / CLI session adds to the same counts)
+# ---------------------------
+_stats = None
+_stats_signature = None
+_stats_lock = threading.Lock()
+
+def get_stats(load_history=None) -> UsageStats:
+    """
+    Load the running aggregates, re-reading the file when another process has
+    updated it. If none exist yet they are built once from the entries
+    `load_history()` returns; it is only called in that case, so a normal
+    start never scans the history. After that only record_consultation()
+    updates them.
+    """
+    global _stats, _stats_signature
+    with _stats_lock:
+        signature = _signature()
+        if _stats is None or signature != _stats_signature:
+            try:
+                _stats, _stats_signature = _read(), signature
+            except Exception:
+                if _stats is None:
+                    with file_lock(STATS_LOCK_FILE):
+                        try:
+                            _stats = _read()   # another window bootstrapped it meanwhile
+                        except Exception:
+                            _stats = UsageStats()
+                            for entry in reversed(load_history() if load_history else []):
+                                _stats.record(entry)
+                            _save(_stats)
+                        _stats_signature = _signature()
+        return _stats
+
+def record_consultation(entry: dict):
+    """Add one consultation to the file's aggregates (re-read under the file lock)"""
+    global _stats, _stats_signature
+    get_stats()
+    with _stats_lock, file_lock(STATS_LOCK_FILE):
+        try:
+            stats = _read()
+        except Exception:
+            stats = _stats
+        stats.record(entry)
+        _save(stats)
+        _stats, _stats_signature = stats, _signature()
+
+def _signature():
+    try:
+        st = os.stat(STATS_FILE)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def _read() -> UsageStats:
+    with open(STATS_FILE, "r", encoding="utf-8") as f:
+        return UsageStats.from_dict(json.load(f))
+
+def _save(stats):
+    tmp = STATS_FILE.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(stats.to_dict(), f)
+    os.replace(tmp, STATS_FILE)
+
+
+# ---------------------------
+# Columnar export (Parquet via pyarrow, else a compressed NumPy .npz)
+# ---------------------------
+def _columns(history):
+    specialists = sorted({normalize_specialist(e.get("specialist", "")) for e in history})
+    codes = {s: i for i, s in enumerate(specialists)}
+    cols = {"timestamp": [], "specialist": [], "query_chars": [], "answer_chars": [], "latency_ms": []}
+    for e in history:
+        # wall-clock seconds as written (no UTC shift), matching the tz-less timestamp column
+        ts = getattr(e, "ts", None)
+        cols["timestamp"].append(parse_timestamp(e.get("timestamp", "")) if ts is None else ts)
+        cols["specialist"].append(codes[normalize_specialist(e.get("specialist", ""))])
+        cols["query_chars"].append(len(e.get("query", "")))
+        cols["answer_chars"].append(len(e.get("result", "")))
+        latency = e.get("latency_ms")
+        cols["latency_ms"].append(float("nan") if latency is None else float(latency))
+    return cols, specialists
+
+def export_columnar(history, path) -> Path:
+    """
+    Write the history as columns. A .parquet path uses pyarrow (specialist as
+    a dictionary column); anything else, or a missing pyarrow, falls back to
+    a NumPy .npz with the specialist names stored once in `specialist_names`.
+    """
+    path = Path(path)
+    cols, specialists = _columns(history)
+    if path.suffix == ".parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            path = path.with_suffix(".npz")
+        else:
+            table = pa.table({
+                "timestamp": pa.array(cols["timestamp"], pa.timestamp("s")),
+                "specialist": pa.DictionaryArray.from_arrays(
+                    pa.array(cols["specialist"], pa.int8()), pa.array(specialists)),
+                "query_chars": pa.array(cols["query_chars"], pa.int32()),
+                "answer_chars": pa.array(cols["answer_chars"], pa.int32()),
+                "latency_ms": pa.array(cols["latency_ms"], pa.float32()),
+            })
+            pq.write_table(table, path, compression="zstd")
+            return path
+    try:
+        import numpy as np
+    except ImportError:
+        raise RuntimeError("Columnar export needs numpy (or pyarrow for .parquet)")
+    path = path.with_suffix(".npz")
+    np.savez_compressed(
+        path,
+        timestamp=np.asarray(cols["timestamp"], dtype=np.int64),
+        specialist=np.asarray(cols["specialist"], dtype=np.int8),
+        specialist_names=np.asarray(specialists),
+        query_chars=np.asarray(cols["query_chars"], dtype=np.int32),
+        answer_chars=np.asarray(cols["answer_chars"], dtype=np.int32),
+        latency_ms=np.asarray(cols["latency_ms"], dtype=np.float32),
+    )
+    return path
+
+
+def format_summary(summary: dict) -> str:
+    """Plain-text rendering used by the GUI Stats tab"""
+    lines = [f"📊 Consultations: {summary['total']}", ""]
+    lines.append("Specialist mix:")
+    for spec, n in summary["by_specialist"].items():
+        share = 100 * n / summary["total"] if summary["total"] else 0
+        lines.append(f"  • {spec:<28} {n:>5}  ({share:.0f}%)")
+    lines += ["", "Last 7 days:"]
+    lines += [f"  • {day}: {n}" for day, n in summary["last_7_days"].items()]
+    lines += ["", f"Answer length: mean {summary['answer_chars_mean']:.0f} chars, "
+                  f"median ≈ {summary['answer_chars_p50'] or 0:.0f} chars"]
+    lat = summary["latency_ms"]
+    if summary["latency_samples"]:
+        lines.append(f"Latency (n={summary['latency_samples']}): p50 ≈ {lat['p50'] / 1000:.1f}s, "
+                     f"p90 ≈ {lat['p90'] / 1000:.1f}s, p99 ≈ {lat['p99'] / 1000:.1f}s")
+    else:
+        lines.append("Latency: no timed consultations yet")
+    return "\n".join(lines)
@@ -0,0 +1,349 @@
+"""
+Local Ayurvedic Knowledge Index
+Bundled herbs, foods and yoga practices keyed by dosha and symptom, so simple
+Herbs / Diet / Yoga lookups are answered instantly without an LLM call
+"""
+
+import re
+
+from model_router import normalize_specialist
+
+DOSHAS = ("vata", "pitta", "kapha")
+TRIDOSHIC = DOSHAS
+
+# ---------------------------
+# Herbs (Dravyaguna): rasa / virya / vipaka and dosha effect
+# ---------------------------
+HERBS = [
+    {"name": "Ashwagandha", "rasa": "bitter, astringent, sweet", "virya": "heating", "vipaka": "sweet",
+     "pacifies": ("vata", "kapha"), "aggravates": ("pitta",),
+     "symptoms": ("anxiety", "stress", "insomnia", "fatigue", "joint pain")},
+    {"name": "Brahmi", "rasa": "bitter, astringent, sweet", "virya": "cooling", "vipaka": "sweet",
+     "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("anxiety", "stress", "focus", "insomnia")},
+    {"name": "Shatavari", "rasa": "sweet, bitter", "virya": "cooling", "vipaka": "sweet",
+     "pacifies": ("vata", "pitta"), "aggravates": ("kapha",),
+     "symptoms": ("acidity", "dryness", "fatigue")},
+    {"name": "Amalaki (Amla)", "rasa": "sour, sweet, bitter, pungent, astringent", "virya": "cooling", "vipaka": "sweet",
+     "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("acidity", "skin", "hair", "immunity", "digestion")},
+    {"name": "Haritaki", "rasa": "astringent, sweet, sour, pungent, bitter", "virya": "heating", "vipaka": "sweet",
+     "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("constipation", "bloating", "ama")},
+    {"name": "Bibhitaki", "rasa": "astringent", "virya": "heating", "vipaka": "sweet",
+     "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("congestion", "ama", "hair")},
+    {"name": "Triphala", "rasa": "all but salty", "virya": "neutral", "vipaka": "sweet",
+     "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("constipation", "ama", "digestion", "skin")},
+    {"name": "Turmeric (Haridra)", "rasa": "bitter, pungent", "virya": "heating", "vipaka": "pungent",
+     "pacifies": ("vata", "kapha"), "aggravates": ("pitta",),
+     "symptoms": ("skin", "joint pain", "inflammation", "immunity")},
+    {"name": "Dry ginger (Shunthi)", "rasa": "pungent", "virya": "heating", "vipaka": "sweet",
+     "pacifies": ("vata", "kapha"), "aggravates": ("pitta",),
+     "symptoms": ("digestion", "bloating", "nausea", "congestion", "ama")},
+    {"name": "Tulsi (Holy basil)", "rasa": "pungent, bitter", "virya": "heating", "vipaka": "pungent",
+     "pacifies": ("vata", "kapha"), "aggravates": ("pitta",),
+     "symptoms": ("congestion", "immunity", "stress")},
+    {"name": "Neem", "rasa": "bitter, astringent", "virya": "cooling", "vipaka": "pungent",
+     "pacifies": ("pitta", "kapha"), "aggravates": ("vata",),
+     "symptoms": ("skin", "inflammation", "heat")},
+    {"name": "Guduchi (Giloy)", "rasa": "bitter, astringent", "virya": "heating", "vipaka": "sweet",
+     "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("immunity", "fever", "joint pain", "acidity")},
+    {"name": "Licorice (Yashtimadhu)", "rasa": "sweet", "virya": "cooling", "vipaka": "sweet",
+     "pacifies": ("vata", "pitta"), "aggravates": ("kapha",),
+     "symptoms": ("acidity", "dryness", "congestion")},
+    {"name": "Guggulu", "rasa": "bitter, pungent, astringent, sweet", "virya": "heating", "vipaka": "pungent",
+     "pacifies": ("vata", "kapha"), "aggravates": ("pitta",),
+     "symptoms": ("joint pain", "weight gain", "inflammation")},
+    {"name": "Trikatu", "rasa": "pungent", "virya": "heating", "vipaka": "pungent",
+     "pacifies": ("vata", "kapha"), "aggravates": ("pitta",),
+     "symptoms": ("digestion", "congestion", "weight gain", "ama")},
+    {"name": "Coriander (Dhanyaka)", "rasa": "astringent, bitter, sweet", "virya": "cooling", "vipaka": "sweet",
+     "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("acidity", "heat", "digestion")},
+    {"name": "Fennel (Shatapushpa)", "rasa": "sweet, bitter", "virya": "cooling", "vipaka": "sweet",
+     "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("bloating", "acidity", "digestion")},
+    {"name": "Cumin (Jiraka)", "rasa": "pungent, bitter", "virya": "cooling", "vipaka": "pungent",
+     "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("bloating", "digestion", "nausea")},
+    {"name": "Manjistha", "rasa": "bitter, astringent, sweet", "virya": "cooling", "vipaka": "pungent",
+     "pacifies": ("pitta", "kapha"), "aggravates": (),
+     "symptoms": ("skin", "inflammation", "heat")},
+    {"name": "Jatamansi", "rasa": "bitter, astringent, sweet", "virya": "cooling", "vipaka": "pungent",
+     "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("insomnia", "anxiety", "stress")},
+    {"name": "Aloe vera (Kumari)", "rasa": "bitter, sweet", "virya": "cooling", "vipaka": "sweet",
+     "pacifies": ("pitta",), "aggravates": (),
+     "symptoms": ("skin", "acidity", "heat", "constipation")},
+    {"name": "Cinnamon (Tvak)", "rasa": "pungent, sweet, bitter", "virya": "heating", "vipaka": "pungent",
+     "pacifies": ("vata", "kapha"), "aggravates": ("pitta",),
+     "symptoms": ("digestion", "congestion", "weight gain")},
+    {"name": "Cardamom (Ela)", "rasa": "pungent, sweet", "virya": "cooling", "vipaka": "sweet",
+     "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("nausea", "bloating", "digestion")},
+    {"name": "Punarnava", "rasa": "bitter, astringent, sweet", "virya": "heating", "vipaka": "sweet",
+     "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("swelling", "weight gain")},
+]
+
+# ---------------------------
+# Foods (Ahara)
+# ---------------------------
+FOODS = [
+    {"name": "Warm cooked grains (rice, oats)", "pacifies": ("vata", "pitta"), "aggravates": ("kapha",),
+     "symptoms": ("dryness", "anxiety", "fatigue"), "note": "grounding and easy to digest"},
+    {"name": "Ghee", "pacifies": ("vata", "pitta"), "aggravates": ("kapha",),
+     "symptoms": ("dryness", "constipation", "acidity"), "note": "kindles Agni without heating"},
+    {"name": "Mung dal kitchari", "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("ama", "digestion", "bloating", "fatigue"), "note": "classic light cleansing meal"},
+    {"name": "Root vegetables, cooked (sweet potato, carrot, beet)", "pacifies": ("vata",), "aggravates": ("kapha",),
+     "symptoms": ("dryness", "anxiety", "constipation"), "note": "sweet, moist and heavy"},
+    {"name": "Sweet ripe fruits (banana, dates, figs)", "pacifies": ("vata",), "aggravates": ("kapha",),
+     "symptoms": ("constipation", "dryness", "fatigue"), "note": "eat apart from meals"},
+    {"name": "Warm spiced milk (nutmeg, cardamom)", "pacifies": ("vata", "pitta"), "aggravates": ("kapha",),
+     "symptoms": ("insomnia", "anxiety"), "note": "at bedtime"},
+    {"name": "Cucumber, coconut water", "pacifies": ("pitta",), "aggravates": ("kapha",),
+     "symptoms": ("heat", "acidity", "skin"), "note": "cooling and hydrating"},
+    {"name": "Sweet melons, grapes, pomegranate", "pacifies": ("pitta",), "aggravates": (),
+     "symptoms": ("heat", "acidity"), "note": "sweet and cooling"},
+    {"name": "Leafy greens (cooked)", "pacifies": ("pitta", "kapha"), "aggravates": ("vata",),
+     "symptoms": ("heat", "weight gain", "skin"), "note": "bitter and astringent"},
+    {"name": "Barley and millet", "pacifies": ("kapha",), "aggravates": ("vata",),
+     "symptoms": ("weight gain", "congestion", "swelling"), "note": "light and drying"},
+    {"name": "Legumes (chickpeas, lentils)", "pacifies": ("pitta", "kapha"), "aggravates": ("vata",),
+     "symptoms": ("weight gain",), "note": "cook well with cumin to limit gas"},
+    {"name": "Raw honey (never heated)", "pacifies": ("kapha",), "aggravates": (),
+     "symptoms": ("congestion", "weight gain"), "note": "scraping; small amounts"},
+    {"name": "Apples and pears (stewed)", "pacifies": ("pitta", "kapha"), "aggravates": (),
+     "symptoms": ("ama", "constipation", "weight gain"), "note": "stew for Vata"},
+    {"name": "Ginger-lemon water, warm", "pacifies": ("vata", "kapha"), "aggravates": ("pitta",),
+     "symptoms": ("digestion", "congestion", "ama", "nausea"), "note": "before meals to kindle Agni"},
+    {"name": "CCF tea (cumin, coriander, fennel)", "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("bloating", "digestion", "acidity", "ama"), "note": "sip through the day"},
+    {"name": "Chili, fried and fermented foods", "pacifies": (), "aggravates": ("pitta",),
+     "symptoms": ("acidity", "heat", "skin"), "note": "reduce when Pitta is high"},
+    {"name": "Raw salads, cold drinks, dry crackers", "pacifies": (), "aggravates": ("vata",),
+     "symptoms": ("bloating", "dryness", "anxiety"), "note": "reduce when Vata is high"},
+    {"name": "Dairy, sweets and heavy fried food", "pacifies": (), "aggravates": ("kapha",),
+     "symptoms": ("congestion", "weight gain", "fatigue"), "note": "reduce when Kapha is high"},
+]
+
+DIET_GUIDELINES = {
+    "vata": "Favour sweet, sour and salty tastes; warm, moist, cooked meals at regular times.",
+    "pitta": "Favour sweet, bitter and astringent tastes; cooling, not-too-spicy meals; never skip lunch.",
+    "kapha": "Favour pungent, bitter and astringent tastes; light, warm, dry meals; keep dinner small.",
+}
+
+# ---------------------------
+# Yoga practices (Asana / Pranayama)
+# ---------------------------
+PRACTICES = [
+    {"name": "Nadi Shodhana (alternate nostril)", "kind": "pranayama", "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("anxiety", "stress", "insomnia", "focus"), "note": "5-10 min, slow and even"},
+    {"name": "Bhramari (humming bee)", "kind": "pranayama", "pacifies": ("vata", "pitta"), "aggravates": (),
+     "symptoms": ("anxiety", "insomnia", "stress", "headache"), "note": "5-7 rounds before bed"},
+    {"name": "Sheetali / Sheetkari (cooling breath)", "kind": "pranayama", "pacifies": ("pitta",), "aggravates": ("vata", "kapha"),
+     "symptoms": ("heat", "acidity", "anger"), "note": "avoid in cold weather"},
+    {"name": "Ujjayi (ocean breath)", "kind": "pranayama", "pacifies": ("vata", "kapha"), "aggravates": (),
+     "symptoms": ("focus", "stress"), "note": "gentle, throughout practice"},
+    {"name": "Bhastrika (bellows breath)", "kind": "pranayama", "pacifies": ("kapha",), "aggravates": ("pitta", "vata"),
+     "symptoms": ("fatigue", "congestion", "weight gain"), "note": "mornings, short rounds"},
+    {"name": "Kapalabhati (skull-shining breath)", "kind": "pranayama", "pacifies": ("kapha",), "aggravates": ("pitta", "vata"),
+     "symptoms": ("digestion", "weight gain", "congestion"), "note": "empty stomach; skip if anxious"},
+    {"name": "Balasana (child's pose)", "kind": "asana", "pacifies": ("vata", "pitta"), "aggravates": (),
+     "symptoms": ("anxiety", "back pain", "fatigue"), "note": "hold 1-3 min"},
+    {"name": "Paschimottanasana (seated forward bend)", "kind": "asana", "pacifies": ("vata", "pitta"), "aggravates": (),
+     "symptoms": ("digestion", "stress", "anger"), "note": "calms and cools"},
+    {"name": "Viparita Karani (legs up the wall)", "kind": "asana", "pacifies": ("vata", "pitta"), "aggravates": (),
+     "symptoms": ("insomnia", "fatigue", "swelling"), "note": "5-10 min in the evening"},
+    {"name": "Vajrasana (thunderbolt pose)", "kind": "asana", "pacifies": TRIDOSHIC, "aggravates": (),
+     "symptoms": ("digestion", "bloating", "acidity"), "note": "5 min after meals"},
+    {"name": "Pawanmuktasana (wind-relieving pose)", "kind": "asana", "pacifies": ("vata",), "aggravates": (),
+     "symptoms": ("bloating", "constipation"), "note": "knees to chest, gentle rocking"},
+    {"name": "Bhujangasana (cobra)", "kind": "asana", "pacifies": ("kapha", "vata"), "aggravates": (),
+     "symptoms": ("back pain", "congestion", "fatigue"), "note": "opens chest"},
+    {"name": "Surya Namaskar (sun salutation), brisk", "kind": "asana", "pacifies": ("kapha",), "aggravates": ("pitta",),
+     "symptoms": ("weight gain", "fatigue", "joint pain"), "note": "6-12 rounds in the morning"},
+    {"name": "Chandra Namaskar (moon salutation)", "kind": "asana", "pacifies": ("pitta",), "aggravates": (),
+     "symptoms": ("heat", "anger", "stress"), "note": "slow, evening practice"},
+    {"name": "Trikonasana (triangle)", "kind": "asana", "pacifies": ("kapha", "vata"), "aggravates": (),
+     "symptoms": ("digestion", "back pain"), "note": "hold 5 breaths per side"},
+    {"name": "Shavasana (corpse pose)", "kind": "asana", "pacifies": ("vata", "pitta"), "aggravates": (),
+     "symptoms": ("stress", "insomnia", "anxiety", "headache"), "note": "10 min to close practice"},
+]
+
+# ---------------------------
+# Query vocabulary -> canonical symptom
+# ---------------------------
+SYMPTOM_WORDS = {
+    "anxiety": ("anxiety", "anxious", "worry", "worried", "worries", "nervous", "restless"),
+    "stress": ("stress", "stressful", "overwhelm", "tension"),
+    # not "sleepy": daytime drowsiness is a Kapha sign, the opposite of insomnia
+    "insomnia": ("insomnia", "sleep", "sleepless"),
+    "acidity": ("acidity", "acid", "acidic", "heartburn", "reflux", "ulcer"),
+    "constipation": ("constipation", "constipated"),
+    "bloating": ("bloating", "bloated", "gas", "flatulence"),
+    "skin": ("skin", "acne", "rash", "pimple", "eczema"),
+    "dryness": ("dry", "dryness"),
+    "hair": ("hair",),
+    "joint pain": ("joint", "arthritis", "stiffness", "knee"),
+    "back pain": ("back pain", "backache"),
+    "fatigue": ("fatigue", "tired", "exhausted", "low energy", "lethargy", "sluggish"),
+    "weight gain": ("weight", "obesity", "overweight"),
+    # "a cold", not bare "cold": cold hands and feet are a Vata sign, not congestion
+    "congestion": ("mucus", "congestion", "cough", "common cold", "a cold", "head cold", "phlegm", "sinus"),
+    "heat": ("heat", "burning", "hot", "sweating"),
+    "anger": ("anger", "angry", "irritable", "irritated", "temper"),
+    "digestion": ("digestion", "digest", "digestive", "appetite", "indigestion", "agni"),
+    "ama": ("ama", "toxin", "coated tongue", "detox"),
+    "nausea": ("nausea", "nauseous", "vomit"),
+    "headache": ("headache", "migraine"),
+    "inflammation": ("inflammation", "inflamed", "swollen joints"),
+    "immunity": ("immunity", "immune"),
+    "focus": ("focus", "memory", "concentration"),
+    "fever": ("fever",),
+    "swelling": ("swelling", "water retention", "edema"),
+}
+
+# whole words only, allowing plain inflections ("knees", "coughing", "bloated"),
+# so "amazed" is not ama and "hotel" is not heat
+_WORD_RE = {
+    canon: re.compile(r"\b(?:" + "|".join(re.escape(w) for w in words) + r")(?:s|es|ed|ing)?\b", re.IGNORECASE)
+    for canon, words in SYMPTOM_WORDS.items()
+}
+_DOSHA_RE = re.compile(r"\b(vata|pitta|kapha)\b", re.IGNORECASE)
+
+
+def parse_query(query: str):
+    """Extract (doshas, symptoms) mentioned in free text"""
+    doshas = {m.lower() for m in _DOSHA_RE.findall(query or "")}
+    symptoms = {canon for canon, rx in _WORD_RE.items() if rx.search(query or "")}
+    return doshas, symptoms
+
+
+# ---------------------------
+# Precomputed inverted indexes
+# ---------------------------
+CATEGORIES = {"herbs": HERBS, "foods": FOODS, "practices": PRACTICES}
+
+def _build_index():
+    index = {}
+    for category, items in CATEGORIES.items():
+        by_dosha = {d: set() for d in DOSHAS}
+        by_symptom = {}
+        for i, item in enumerate(items):
+            for d in item["pacifies"]:
+                by_dosha[d].add(i)
+            for s in item["symptoms"]:
+                by_symptom.setdefault(s, set()).add(i)
+        index[category] = (by_dosha, by_symptom)
+    return index
+
+_INDEX = _build_index()
+
+
+def search(category, doshas=(), symptoms=(), kind=None, limit=6):
+    """Items of a category ranked by symptom matches and dosha fit"""
+    items = CATEGORIES[category]
+    by_dosha, by_symptom = _INDEX[category]
+    candidates = set()
+    for d in doshas:
+        candidates |= by_dosha.get(d, set())
+    for s in symptoms:
+        candidates |= by_symptom.get(s, set())
+
+    def score(i):
+        item = items[i]
+        hits = 2 * len(set(item["symptoms"]) & set(symptoms))
+        fit = sum(1 for d in doshas if d in item["pacifies"])
+        harm = sum(3 for d in doshas if d in item["aggravates"])
+        return hits + fit - harm
+
+    ranked = sorted((i for i in candidates if kind is None or items[i].get("kind") == kind),
+                    key=lambda i: (-score(i), i))
+    return [items[i] for i in ranked if score(i) > 0][:limit]
+
+
+# ---------------------------
+# Formatting
+# ---------------------------
+def _effect(item):
+    parts = []
+    if item["pacifies"]:
+        parts.append("pacifies " + ("all three doshas" if item["pacifies"] == TRIDOSHIC
+                                    else "/".join(d.title() for d in item["pacifies"])))
+    if item["aggravates"]:
+        parts.append("may aggravate " + "/".join(d.title() for d in item["aggravates"]))
+    return "; ".join(parts)
+
+def format_herb(item):
+    return (f"• {item['name']} — Rasa: {item['rasa']} | Virya: {item['virya']} | "
+            f"Vipaka: {item['vipaka']} — {_effect(item)}. Helps: {', '.join(item['symptoms'])}.")
+
+def format_item(item):
+    return f"• {item['name']} — {_effect(item)}. Helps: {', '.join(item['symptoms'])}. ({item['note']})"
+
+def _heading(doshas, symptoms):
+    keys = [d.title() for d in sorted(doshas)] + sorted(symptoms)
+    return ", ".join(keys)
+
+
+def lookup(tab: str, query: str):
+    """
+    Answer a Herbs / Diet / Yoga tab lookup from the local index.
+    Returns formatted text, or None if the query names no dosha or symptom.
+    """
+    doshas, symptoms = parse_query(query)
+    if not doshas and not symptoms:
+        return None
+    lines = [f"📚 Local index — {_heading(doshas, symptoms)}", ""]
+    if tab == "herbs":
+        found = search("herbs", doshas, symptoms, limit=8)
+        lines += [format_herb(h) for h in found]
+    elif tab == "diet":
+        lines += [f"{d.title()}: {DIET_GUIDELINES[d]}" for d in sorted(doshas)]
+        found = search("foods", doshas, symptoms, limit=8)
+        favour = [f for f in found if f["pacifies"]]
+        avoid = [f for f in FOODS if any(d in f["aggravates"] for d in doshas) and not f["pacifies"]]
+        if favour:
+            lines += ["", "Favour:"] + [format_item(f) for f in favour]
+        if avoid:
+            lines += ["", "Reduce:"] + [f"• {f['name']} ({f['note']})" for f in avoid]
+    else:
+        lower = query.lower()
+        kind = "pranayama" if ("pranayama" in lower or "breath" in lower) else \
+               "asana" if ("asana" in lower or "pose" in lower) else None
+        found = search("practices", doshas, symptoms, kind=kind, limit=8)
+        lines += [format_item(p) for p in found]
+    if len(lines) <= 2:
+        return None
+    return "\n".join(lines)
+
+
+# Which index sections each specialist's prompt draws on
+_SPECIALIST_SOURCES = {
+    "Herbal & Remedy Guide": ("herbs",),
+    "Ahara (Diet) Specialist": ("foods",),
+    "Yoga & Pranayama Guide": ("practices",),
+    "Agni & Ama Consultant": ("herbs", "foods"),
+}
+
+def retrieve_context(query: str, specialist: str, per_source: int = 3) -> str:
+    """Compact reference lines for the specialist prompt ('' when nothing matches)"""
+    doshas, symptoms = parse_query(query)
+    if not doshas and not symptoms:
+        return ""
+    sources = _SPECIALIST_SOURCES.get(normalize_specialist(specialist), ("herbs", "foods", "practices"))
+    lines = []
+    for source in sources:
+        for item in search(source, doshas, symptoms, limit=per_source):
+            if source == "herbs":
+                lines.append(f"- {item['name']}: {item['rasa']}; {item['virya']}; {item['vipaka']} vipaka; {_effect(item)}")
+            else:
+                lines.append(f"- {item['name']}: {_effect(item)}")
+    if not lines:
+        return ""
+    return "REFERENCE (local index, use where relevant):\n" + "\n".join(lines)
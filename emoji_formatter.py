@@ -0,0 +1,196 @@
+"""
+Emoji Keyword Formatter (Python port of emojiFormatter.js)
+All rules are compiled into one case-insensitive alternation, so text is decorated
+in a single linear pass; StreamFormatter does the same for streamed chunks
+"""
+
+import re
+import random
+
+# ---------------------------
+# Rule table (same order and keywords as emojiFormatter.js)
+# ---------------------------
+RULES = [
+    # 🌿 Ayurveda Concepts
+    (("ayurveda",), "🌿"),
+    (("dosha",), "⚖️"),
+    (("vata",), "🌬️"),
+    (("pitta",), "🔥"),
+    (("kapha",), "💧"),
+
+    # 💚 Health & Wellness
+    (("health",), "💚"),
+    (("wellness",), "🌱"),
+    (("energy",), "⚡"),
+    (("immunity", "immune"), "🛡️"),
+    (("protection",), "🛡️"),
+    (("pain",), "💆‍♂️"),
+    (("headache", "migraine"), "🤕"),
+
+    # 🧘 Mental Health
+    (("stress",), "🧘‍♂️"),
+    (("anxiety",), "😌"),
+    (("calm",), "🌙"),
+    (("sleep",), "😴"),
+
+    # 🍃 Herbs & Remedies
+    (("herb", "herbal"), "🌱"),
+    (("turmeric",), "🟡"),
+    (("ashwagandha",), "🧪"),
+    (("tulsi",), "🍃"),
+    (("remedy", "cure", "treatment"), "🩺"),
+
+    # 🍽️ Diet
+    (("diet",), "🥗"),
+    (("food",), "🍽️"),
+    (("drink",), "🥤"),
+    (("tea",), "🍵"),
+
+    # ✨ Skin & Beauty
+    (("skin",), "✨"),
+    (("glow",), "🌟"),
+    (("hair",), "💇‍♀️"),
+
+    # ❤️ Emotional State
+    (("happy",), "😊"),
+    (("sad",), "😔"),
+
+    # 🎯 Focus
+    (("focus",), "🎯"),
+    (("clarity",), "🔎"),
+
+    # ✨ Boosting words
+    (("improve",), "⬆️"),
+    (("boost",), "🔋"),
+    (("increase",), "📈"),
+]
+
+ENDING_PACK = ["🌿", "💚", "✨", "😊", "🧘‍♂️", "🌱", "⚡", "🔥"]
+
+# keyword -> emoji; the first rule wins, as it would in the JS rule order
+_EMOJI_FOR = {}
+for _keywords, _emoji in RULES:
+    for _kw in _keywords:
+        _EMOJI_FOR.setdefault(_kw, _emoji)
+
+
+def _trie_pattern(keywords):
+    """
+    Prefix-factored alternation, e.g. "h(?:a(?:ir|ppy)|e(?:a(?:dache|lth)|rb))",
+    so the engine compares at most a few characters per position. A keyword
+    that extends an earlier one is dropped: as with /herb|herbal/ in the JS,
+    the shorter keyword always matches first.
+    """
+    trie = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            if "" in node:
+                break
+            node = node.setdefault(ch, {})
+        else:
+            node.clear()
+            node[""] = True
+
+    def emit(node):
+        if "" in node:
+            return ""
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items())]
+        return alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+
+    # the lookahead lets the scanner skip positions that cannot start a keyword
+    first = "".join(sorted({kw[0] for kw in keywords}))
+    return f"(?=[{first}]){emit(trie)}"
+
+_PATTERN = re.compile(_trie_pattern(_EMOJI_FOR), re.IGNORECASE)
+_MAX_KEYWORD = max(len(kw) for kw in _EMOJI_FOR)
+
+
+def _decorate(match):
+    return f"{match.group(0)} {_EMOJI_FOR[match.group(0).lower()]}"
+
+def emoji_formatter(text: str) -> str:
+    """Append the rule's emoji after every keyword, in one pass over the text"""
+    return _PATTERN.sub(_decorate, text)
+
+def add_ending_emoji(text: str) -> str:
+    return f"{text} {random.choice(ENDING_PACK)}"
+
+def format_with_emojis(text: str) -> str:
+    return add_ending_emoji(emoji_formatter(text))
+
+
+class StreamFormatter:
+    """
+    Decorates text arriving in chunks. The last (longest keyword - 1)
+    characters are held back until the next chunk, so a keyword split
+    across a chunk boundary is still recognised.
+
+        fmt = StreamFormatter()
+        for chunk in stream:
+            print(fmt.feed(chunk), end="")
+        print(fmt.flush())
+    """
+
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, chunk: str) -> str:
+        buf = self._pending + chunk
+        # every match starting before `safe` has all the characters it needs
+        safe = len(buf) - (_MAX_KEYWORD - 1)
+        out = []
+        pos = 0
+        for m in _PATTERN.finditer(buf):
+            if m.start() >= safe:
+                break
+            out.append(buf[pos:m.end()])
+            out.append(" " + _EMOJI_FOR[m.group(0).lower()])
+            pos = m.end()
+        end = max(pos, safe)
+        out.append(buf[pos:end])
+        self._pending = buf[end:]
+        return "".join(out)
+
+    def flush(self) -> str:
+        """Emit whatever is still held back (call once the stream ends)"""
+        tail, self._pending = self._pending, ""
+        return emoji_formatter(tail)
+
+
+# ---------------------------
+# Benchmark: single pass vs the JS-style pass-per-rule approach
+# ---------------------------
+_NAIVE_RULES = [
+    (re.compile("|".join(keywords), re.IGNORECASE), emoji) for keywords, emoji in RULES
+]
+
+def naive_emoji_formatter(text: str) -> str:
+    """Reference port of the JS algorithm: one full rescan per rule"""
+    for rx, emoji in _NAIVE_RULES:
+        text = rx.sub(lambda m, e=emoji: f"{m.group(0)} {e}", text)
+    return text
+
+
+if __name__ == "__main__":
+    import json
+    import timeit
+    from pathlib import Path
+
+    history = Path("consult_history.json")
+    texts = [e["result"] for e in json.loads(history.read_text(encoding="utf-8"))] if history.exists() else []
+    corpus = "\n".join(texts) or ("Pitta imbalance, skin health and sleep. Drink tulsi tea. " * 2000)
+    print(f"Corpus: {len(corpus):,} chars, {len(RULES)} rules")
+
+    mismatches = sum(naive_emoji_formatter(t) != emoji_formatter(t) for t in texts or [corpus])
+    print(f"Outputs differing from the multi-pass reference: {mismatches}")
+
+    fmt = StreamFormatter()
+    streamed = "".join(fmt.feed(corpus[i:i + 7]) for i in range(0, len(corpus), 7)) + fmt.flush()
+    print(f"Streamed (7-char chunks) == one-shot: {streamed == emoji_formatter(corpus)}")
+
+    runs = 20
+    naive = timeit.timeit(lambda: naive_emoji_formatter(corpus), number=runs) / runs
+    single = timeit.timeit(lambda: emoji_formatter(corpus), number=runs) / runs
+    print(f"Multi-pass: {naive * 1000:8.2f} ms")
+    print(f"Single-pass: {single * 1000:7.2f} ms  ({naive / single:.1f}x faster)")
@@ -0,0 +1,36 @@
+"""
+Cross-Process File Lock
+O_EXCL lock file shared by everything that read-modify-writes a small state file
+(quota bucket, usage stats, specialist model) from several windows at once
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+LOCK_STALE_SECONDS = 10.0   # a lock file older than this belongs to a crashed process
+
+
+@contextmanager
+def file_lock(lock_file, stale_seconds=LOCK_STALE_SECONDS):
+    """Hold `lock_file` (created exclusively, removed on exit) for the duration of the block"""
+    while True:
+        try:
+            fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_file) > stale_seconds:
+                    os.unlink(lock_file)
+                    continue
+            except OSError:
+                continue
+            time.sleep(0.005)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        try:
+            os.unlink(lock_file)
+        except OSError:
+            pass
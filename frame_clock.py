@@ -0,0 +1,212 @@
+"""
+Frame Clock
+One after() chain drives every GUI animation: each subscriber runs at its own rate,
+the clock slows down while the window is unfocused and stops completely while it is
+minimised or hidden, so an idle window costs no wakeups
+"""
+
+import time
+import tkinter as tk
+
+FOREGROUND_FPS = 50      # upper bound for any animation while the window has focus
+BACKGROUND_FPS = 4       # ...and while another application has focus
+MIN_DELAY_MS = 5         # never schedule ticks closer together than this
+COALESCE_SECONDS = 0.01  # frames due this close to a tick run in it instead of waking again
+
+
+class _Subscriber:
+    __slots__ = ("callback", "fps", "last", "due")
+
+    def __init__(self, callback, fps, now):
+        self.callback = callback
+        self.fps = fps
+        self.last = now
+        self.due = now
+
+
+class FrameClock:
+    """
+    Central animation scheduler bound to a Tk root.
+
+        clock = FrameClock(root)
+        clock.subscribe("logo", lambda dt: spin(dt), fps=20)
+        clock.unsubscribe("logo")
+
+    A callback receives the seconds elapsed since its previous frame (so
+    animations can be time-based and survive dropped frames) and may return
+    False to unsubscribe itself. No timer is pending while there are no
+    subscribers or the window is not mapped.
+    """
+
+    def __init__(self, root, fps=FOREGROUND_FPS, background_fps=BACKGROUND_FPS, clock=time.monotonic):
+        self.root = root
+        self.fps = fps
+        self.background_fps = background_fps
+        self._clock = clock
+        self._subs = {}
+        self._after_id = None
+        self.visible = True
+        self.focused = True
+
+        # counters
+        self.wakeups = 0
+        self.frames = 0
+        self.tick_cpu = 0.0
+        self.state_seconds = {"focused": 0.0, "unfocused": 0.0, "hidden": 0.0}
+        self.state_cpu = dict(self.state_seconds)
+        self.state_wakeups = {k: 0 for k in self.state_seconds}
+        self._state_since = (clock(), time.process_time())
+
+        root.bind("<Map>", self._on_map, add="+")
+        root.bind("<Unmap>", self._on_unmap, add="+")
+        root.bind("<FocusIn>", self._on_focus_change, add="+")
+        root.bind("<FocusOut>", self._on_focus_change, add="+")
+        root.bind("<Destroy>", self._on_destroy, add="+")
+
+    # ---------------------------
+    # Subscriptions
+    # ---------------------------
+    def subscribe(self, name, callback, fps=FOREGROUND_FPS):
+        """Register (or replace) an animation; it gets its first frame on the next tick"""
+        self._subs[name] = _Subscriber(callback, fps, self._clock())
+        self._reschedule()
+
+    def unsubscribe(self, name):
+        self._subs.pop(name, None)
+        if not self._subs:
+            self._cancel()
+
+    # ---------------------------
+    # Tick loop
+    # ---------------------------
+    @property
+    def state(self):
+        if not self.visible:
+            return "hidden"
+        return "focused" if self.focused else "unfocused"
+
+    def _interval(self, sub):
+        cap = self.fps if self.focused else self.background_fps
+        return 1.0 / max(0.1, min(sub.fps, cap))
+
+    def _cancel(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _reschedule(self):
+        self._cancel()
+        if not self._subs or not self.visible:
+            return
+        wait = min(sub.due for sub in self._subs.values()) - self._clock()
+        self._after_id = self.root.after(max(MIN_DELAY_MS, int(wait * 1000)), self._tick)
+
+    def _tick(self):
+        self._after_id = None
+        cpu_start = time.process_time()
+        self.wakeups += 1
+        self.state_wakeups[self.state] += 1
+        now = self._clock()
+        try:
+            for name, sub in list(self._subs.items()):
+                if now + COALESCE_SECONDS < sub.due:
+                    continue
+                dt, sub.last = now - sub.last, now
+                sub.due = now + self._interval(sub)
+                try:
+                    keep = sub.callback(dt)
+                except tk.TclError:
+                    keep = False  # its widget was destroyed
+                self.frames += 1
+                if keep is False and self._subs.get(name) is sub:
+                    del self._subs[name]
+        finally:
+            # any other error reaches Tk's error report; the remaining animations keep running
+            self.tick_cpu += time.process_time() - cpu_start
+            self._reschedule()
+
+    # ---------------------------
+    # Window state
+    # ---------------------------
+    def _set_state(self, visible, focused):
+        if (visible, focused) == (self.visible, self.focused):
+            return
+        self._close_state_period()
+        self.visible, self.focused = visible, focused
+        now = self._clock()
+        if visible:
+            # resume from "now" so the first frame after a pause gets a sane dt
+            for sub in self._subs.values():
+                sub.last = max(sub.last, now - self._interval(sub))
+                sub.due = min(sub.due, now + self._interval(sub))
+        self._reschedule()
+
+    def _close_state_period(self):
+        wall, cpu = self._clock(), time.process_time()
+        since_wall, since_cpu = self._state_since
+        self.state_seconds[self.state] += wall - since_wall
+        self.state_cpu[self.state] += cpu - since_cpu
+        self._state_since = (wall, cpu)
+
+    def _on_map(self, event):
+        if event.widget is self.root:
+            self._set_state(True, self.focused)
+
+    def _on_unmap(self, event):
+        if event.widget is self.root:
+            self._set_state(False, self.focused)
+
+    def _on_focus_change(self, event):
+        # focus moving between child widgets also fires FocusOut/FocusIn,
+        # so look at where focus ended up once Tk has settled
+        self.root.after_idle(self._check_focus)
+
+    def _check_focus(self):
+        try:
+            focused = self.root.focus_displayof() is not None
+        except Exception:
+            focused = True
+        self._set_state(self.visible, focused)
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self._subs.clear()
+            self._cancel()
+
+    # ---------------------------
+    # Counters
+    # ---------------------------
+    def snapshot(self) -> dict:
+        """Wakeups and process CPU time per window state (focused / unfocused / hidden)"""
+        self._close_state_period()
+        return {
+            "state": self.state,
+            "animations": sorted(self._subs),
+            "wakeups": self.wakeups,
+            "frames": self.frames,
+            "tick_cpu_s": self.tick_cpu,
+            "per_state": {
+                s: {
+                    "seconds": self.state_seconds[s],
+                    "wakeups": self.state_wakeups[s],
+                    "wakeups_per_s": self.state_wakeups[s] / self.state_seconds[s] if self.state_seconds[s] else 0.0,
+                    "cpu_pct": 100 * self.state_cpu[s] / self.state_seconds[s] if self.state_seconds[s] else 0.0,
+                }
+                for s in self.state_seconds
+            },
+        }
+
+
+def format_snapshot(snap: dict) -> str:
+    """Plain-text rendering used by the GUI Stats tab"""
+    lines = [f"🎞️ Frame clock: {snap['wakeups']} wakeups, {snap['frames']} frames, "
+             f"{snap['tick_cpu_s'] * 1000:.0f} ms CPU in animations "
+             f"(now {snap['state']}; running: {', '.join(snap['animations']) or 'none'})"]
+    for state, s in snap["per_state"].items():
+        if s["seconds"]:
+            lines.append(f"  • {state:<10} {s['seconds']:>7.0f}s  {s['wakeups_per_s']:5.1f} wakeups/s  "
+                         f"process CPU {s['cpu_pct']:.1f}%")
+    return "\n".join(lines)
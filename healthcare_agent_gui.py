@@ -1,9 +1,7 @@
 
-import os
 import threading
 import math
 import time
-import json
 from datetime import datetime
 from pathlib import Path
 import textwrap
@@ -16,7 +14,19 @@ import tkinter as tk
 from tkinter import messagebox, filedialog
 
 # LLM / CrewAI - keep your integration intact
-from crewai import Agent, Task, Crew, LLM
+from crewai import Agent, Task, Crew
+from model_router import get_router, build_llm, normalize_specialist, resolve_api_key
+from prompts import get_prompt, ProfileTimer, profile_latency_summary, format_profile_latency
+from rate_limiter import get_scheduler, PRIORITY_INTERACTIVE, format_snapshot as format_quota_snapshot
+from emoji_formatter import emoji_formatter
+from ayurveda_index import lookup, retrieve_context
+from specialist_router import route_query, learn_from_entry
+from analytics import get_stats, record_consultation, export_columnar, format_summary
+from sessions import Session, load_sessions, save_session, get_session
+from frame_clock import FrameClock, format_snapshot as format_clock_snapshot
+from singleflight import get_singleflight, consultation_key, format_snapshot as format_flight_snapshot
+from history_store import load_history, append_history as store_history, StaleHistoryError
+from report_cache import ReportCache, artifact_key
 
 # Imaging
 from PIL import Image, ImageDraw, ImageTk, ImageFilter
@@ -28,7 +38,8 @@ from reportlab.pdfgen import canvas as pdfcanvas
 
 # Load env
 load_dotenv()
-API_KEY = os.getenv("GOOGLE_API_KEY")
+# a placeholder key is used when VEDACARE_LLM_BASE_URL points at the mock server
+API_KEY = resolve_api_key()
 
 # ---------------------------
 # Theme presets (you can edit)
@@ -68,7 +79,7 @@ CURRENT_THEME = THEMES["Classic Ayurveda"]
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("green")
 
-HISTORY_FILE = Path("consult_history.json")
+AUTO_CHOICE = "🤖 Auto (best match)"
 
 
 # ---------------------------
@@ -139,17 +150,20 @@ def make_chakra_image(size=64):
 # ---------------------------
 # PDF export
 # ---------------------------
+REPORT_TITLE = "Ayurvedic Consultation Report"
+
 def textwrap_lines(txt: str, width: int):
     return textwrap.wrap(txt, width=width) or [""]
 
-def save_pdf_report(filepath: str, title: str, specialist: str, query: str, result_text: str):
+def save_pdf_report(filepath: str, title: str, specialist: str, query: str, result_text: str, theme=None):
+    theme = theme or CURRENT_THEME
     c = pdfcanvas.Canvas(filepath, pagesize=A4)
     width, height = A4
     margin = 40
     y = height - margin
 
     c.setFont("Helvetica-Bold", 20)
-    c.setFillColor(colors.HexColor(CURRENT_THEME["primary"]))
+    c.setFillColor(colors.HexColor(theme["primary"]))
     c.drawString(margin, y, "🌿 " + title)
     y -= 30
 
@@ -158,7 +172,7 @@ def save_pdf_report(filepath: str, title: str, specialist: str, query: str, resu
     c.drawString(margin, y, f"Specialist: {specialist}    Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     y -= 18
 
-    c.setStrokeColor(colors.HexColor(CURRENT_THEME["accent"]))
+    c.setStrokeColor(colors.HexColor(theme["accent"]))
     c.line(margin, y, width - margin, y)
     y -= 14
 
@@ -188,22 +202,12 @@ def save_pdf_report(filepath: str, title: str, specialist: str, query: str, resu
 # ---------------------------
 # History helpers (local JSON)
 # ---------------------------
-def load_history():
-    if HISTORY_FILE.exists():
-        try:
-            with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return []
-    return []
-
+# load_history() returns compact records; each result is read from disk on access
 def append_history(entry: dict):
-    history = load_history()
-    history.insert(0, entry)  # newest first
-    # keep last 200
-    history = history[:200]
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, ensure_ascii=False, indent=2)
+    store_history(entry)  # newest first, keeps the last VEDACARE_HISTORY_LIMIT
+    # keep the specialist auto-router and usage stats up to date (no rescans)
+    learn_from_entry(entry)
+    record_consultation(entry)
 
 # ---------------------------
 # Main App class
@@ -234,6 +238,12 @@ class AyurvedaUltraX10000(ctk.CTk):
         self.last_result = ""
         self.last_specialist = ""
         self.last_query = ""
+        self.last_timing = ""
+
+        # every animation runs off this one clock (throttled when unfocused, stopped when minimised)
+        self.frame_clock = FrameClock(self)
+        # PDF / Markdown rendered in the background once a result arrives
+        self.report_cache = ReportCache()
 
         # build
         self.create_header()
@@ -243,6 +253,14 @@ class AyurvedaUltraX10000(ctk.CTk):
         # start logo rotation
         self._rotate_logo()
 
+        # stop the report renderer with the window
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _on_close(self):
+        # queued renders are cancelled; a render already running is not waited for
+        self.report_cache.shutdown()
+        self.destroy()
+
     # Theme apply
     def apply_theme(self, theme_name):
         global CURRENT_THEME
@@ -289,15 +307,19 @@ class AyurvedaUltraX10000(ctk.CTk):
         except Exception:
             pass
         self.logo_label.configure(bg=CURRENT_THEME["bg"])
+        # the PDF uses theme colours: drop the old render and start the new one
+        self._prerender_reports()
 
     def _rotate_logo(self):
-        # smooth rotation for the logo
-        self.logo_angle = (self.logo_angle + 2) % 360
+        self.frame_clock.subscribe("logo", self._logo_frame, fps=20)
+
+    def _logo_frame(self, dt):
+        # smooth rotation for the logo (40 degrees per second)
+        self.logo_angle = (self.logo_angle + 40 * dt) % 360
         rotated = self.logo_img.rotate(self.logo_angle, resample=Image.BICUBIC)
         self.logo_tk = ImageTk.PhotoImage(rotated)
         self.logo_label.configure(image=self.logo_tk)
         self.logo_label.image = self.logo_tk
-        self.after(50, self._rotate_logo)  # 20 fps approx
 
     # ---------------------------
     # Sidebar: animated collapse/expand
@@ -318,9 +340,10 @@ class AyurvedaUltraX10000(ctk.CTk):
             "🌿 Herbal & Remedy Guide",
             "🍃 Ahara (Diet) Specialist",
             "🕉 Yoga & Pranayama Guide",
-            "🔥 Agni & Ama Consultant"
+            "🔥 Agni & Ama Consultant",
+            AUTO_CHOICE
         ]
-        self.role_menu = ctk.CTkOptionMenu(self.sidebar_frame, values=self.specialists)
+        self.role_menu = ctk.CTkOptionMenu(self.sidebar_frame, values=self.specialists, command=self._on_specialist_change)
         self.role_menu.grid(row=1, column=0, padx=12, pady=(0,12), sticky="ew")
         self.role_menu.set(self.specialists[0])
 
@@ -332,8 +355,10 @@ class AyurvedaUltraX10000(ctk.CTk):
         self.pdf_btn = ctk.CTkButton(self.sidebar_frame, text="📜 Download PDF Report", height=40, command=self._on_pdf_export)
         self.pdf_btn.grid(row=4, column=0, padx=12, pady=(6,8), sticky="ew")
 
-        # spacer
-        ctk.CTkLabel(self.sidebar_frame, text="").grid(row=5, column=0, pady=6)
+        # response profile (quick = smaller output budget, lower latency)
+        self.profile_menu = ctk.CTkSegmentedButton(self.sidebar_frame, values=["📖 Standard", "⚡ Quick"])
+        self.profile_menu.grid(row=5, column=0, padx=12, pady=6, sticky="ew")
+        self.profile_menu.set("📖 Standard")
 
         # history quick access
         self.history_quick_btn = ctk.CTkButton(self.sidebar_frame, text="🕘 View History", height=36, command=lambda: self.tabview.set("History"))
@@ -353,17 +378,15 @@ class AyurvedaUltraX10000(ctk.CTk):
             self._animate_sidebar(320, 60)
             self.sidebar_collapsed = True
 
-    def _animate_sidebar(self, from_w, to_w, steps=10, delay=20):
-        delta = (to_w - from_w) / steps
-        def step(i=0, cur=from_w):
-            w = int(from_w + delta * i)
-            self.sidebar_frame.configure(width=w)
-            if i < steps:
-                self.after(delay, step, i+1, w)
-            else:
-                # final adjust
-                self.sidebar_frame.configure(width=to_w)
-        step()
+    def _animate_sidebar(self, from_w, to_w, duration=0.2):
+        elapsed = 0.0
+        def step(dt):
+            nonlocal elapsed
+            elapsed += dt
+            t = min(1.0, elapsed / duration)
+            self.sidebar_frame.configure(width=int(from_w + (to_w - from_w) * t))
+            return t < 1.0
+        self.frame_clock.subscribe("sidebar", step, fps=50)
 
     # ---------------------------
     # Main: Tabview with pages
@@ -384,14 +407,17 @@ class AyurvedaUltraX10000(ctk.CTk):
         self.tabview.add("Yoga")
         self.tabview.add("Report")
         self.tabview.add("History")
+        self.tabview.add("Stats")
         self.tabview.set("Consult")
 
+        self.lookup_outputs = {}
         self._build_consult_tab()
         self._build_diet_tab()
         self._build_herbs_tab()
         self._build_yoga_tab()
         self._build_report_tab()
         self._build_history_tab()
+        self._build_stats_tab()
 
     # ---------------------------
     # Consult tab contents
@@ -406,6 +432,15 @@ class AyurvedaUltraX10000(ctk.CTk):
         ctk.CTkLabel(input_card, text="📝 Describe your symptoms & lifestyle", font=ctk.CTkFont(size=13, weight="bold")).pack(anchor="w", padx=12, pady=(8,4))
         self.query_box = ctk.CTkTextbox(input_card, height=160, wrap="word")
         self.query_box.pack(fill="both", padx=12, pady=(0,12))
+        # session: follow-up questions reuse a bounded summary of earlier turns
+        session_row = ctk.CTkFrame(input_card, fg_color="transparent")
+        session_row.pack(fill="x", padx=12, pady=(0,12))
+        self.session_menu = ctk.CTkOptionMenu(session_row, values=["➕ New session"], command=self._on_session_select)
+        self.session_menu.pack(side="left", fill="x", expand=True)
+        ctk.CTkButton(session_row, text="🆕", width=40, command=self._new_session).pack(side="left", padx=(6,0))
+        self.session_label = ctk.CTkLabel(input_card, text="", text_color="gray")
+        self.session_label.pack(anchor="w", padx=12, pady=(0,8))
+        self._new_session()
         # chakra loader area (canvas)
         self.loader_canvas = tk.Canvas(input_card, width=72, height=72, bg=CURRENT_THEME["card"], highlightthickness=0)
         self.loader_canvas.place(relx=1.0, rely=0.0, x=-90, y=12)
@@ -421,13 +456,36 @@ class AyurvedaUltraX10000(ctk.CTk):
         self.output_box = ctk.CTkTextbox(output_card, wrap="word")
         self.output_box.grid(row=4, column=0, sticky="nsew", padx=12, pady=(6,12))
 
+    # ---------------------------
+    # Instant lookups (local index, no LLM call)
+    # ---------------------------
+    def _build_lookup_bar(self, frame, tab, placeholder):
+        bar = ctk.CTkFrame(frame, fg_color="transparent")
+        bar.pack(fill="x", padx=12, pady=(0,8))
+        entry = ctk.CTkEntry(bar, placeholder_text=placeholder)
+        entry.pack(side="left", fill="x", expand=True)
+        entry.bind("<Return>", lambda e: self._on_lookup(tab, entry.get()))
+        ctk.CTkButton(bar, text="🔎 Look up", width=110, command=lambda: self._on_lookup(tab, entry.get())).pack(side="left", padx=(6,0))
+
+    def _on_lookup(self, tab, query):
+        if not query.strip():
+            return
+        answer = lookup(tab, query)
+        if answer is None:
+            answer = "No match in the local index. Mention a dosha (Vata, Pitta, Kapha) or a symptom, or run a full consultation for personalised guidance."
+        box = self.lookup_outputs[tab]
+        box.delete("1.0", "end")
+        box.insert("1.0", answer)
+
     # ---------------------------
     # Diet tab (placeholder with dynamic content)
     # ---------------------------
     def _build_diet_tab(self):
         frame = self.tabview.tab("Diet Plan")
         ctk.CTkLabel(frame, text="🍽️ Diet Plan Suggestions", font=ctk.CTkFont(size=15, weight="bold")).pack(anchor="w", padx=12, pady=12)
+        self._build_lookup_bar(frame, "diet", "e.g. foods for Kapha with congestion")
         self.diet_text = ctk.CTkTextbox(frame, wrap="word")
+        self.lookup_outputs["diet"] = self.diet_text
         self.diet_text.pack(fill="both", padx=12, pady=(0,12), expand=True)
         self.diet_text.insert("1.0", "Run a consultation to populate personalized diet plan here.")
 
@@ -437,7 +495,9 @@ class AyurvedaUltraX10000(ctk.CTk):
     def _build_herbs_tab(self):
         frame = self.tabview.tab("Herbs")
         ctk.CTkLabel(frame, text="🌿 Herbal & Remedy Guide", font=ctk.CTkFont(size=15, weight="bold")).pack(anchor="w", padx=12, pady=12)
+        self._build_lookup_bar(frame, "herbs", "e.g. which herbs pacify Pitta?")
         self.herb_text = ctk.CTkTextbox(frame, wrap="word")
+        self.lookup_outputs["herbs"] = self.herb_text
         self.herb_text.pack(fill="both", padx=12, pady=(0,12), expand=True)
         self.herb_text.insert("1.0", "Herbal suggestions will appear after consultation.")
 
@@ -447,7 +507,9 @@ class AyurvedaUltraX10000(ctk.CTk):
     def _build_yoga_tab(self):
         frame = self.tabview.tab("Yoga")
         ctk.CTkLabel(frame, text="🧘 Yoga & Pranayama", font=ctk.CTkFont(size=15, weight="bold")).pack(anchor="w", padx=12, pady=12)
+        self._build_lookup_bar(frame, "yoga", "e.g. which pranayama suits Vata?")
         self.yoga_text = ctk.CTkTextbox(frame, wrap="word")
+        self.lookup_outputs["yoga"] = self.yoga_text
         self.yoga_text.pack(fill="both", padx=12, pady=(0,12), expand=True)
         self.yoga_text.insert("1.0", "Yoga & breathing recommendations will populate after consultation.")
 
@@ -489,7 +551,8 @@ class AyurvedaUltraX10000(ctk.CTk):
 
     def _refresh_history_list(self):
         self.history_listbox.delete(0, tk.END)
-        hist = load_history()
+        # the listbox shows this snapshot; selections index into it, not a newer load
+        self._history_view = hist = load_history()
         for i, entry in enumerate(hist):
             ts = entry.get("timestamp", "")
             spec = entry.get("specialist", "")
@@ -502,14 +565,114 @@ class AyurvedaUltraX10000(ctk.CTk):
         if not sel:
             return
         idx = sel[0]
-        hist = load_history()
-        if idx >= len(hist):
+        if idx >= len(self._history_view):
             return
-        entry = hist[idx]
-        detail_text = f"Timestamp: {entry.get('timestamp')}\nSpecialist: {entry.get('specialist')}\n\nQuery:\n{entry.get('query')}\n\nResult:\n{entry.get('result')}"
+        entry = self._history_view[idx]
+        try:
+            result = entry.get('result')
+        except StaleHistoryError:
+            # another window appended since the list was built: reload and find the same consultation
+            self._refresh_history_list()
+            idx = next((i for i, e in enumerate(self._history_view)
+                        if e.ts == entry.ts and e.query == entry.query), None)
+            if idx is None:
+                self.history_detail.delete("1.0", "end")
+                self.history_detail.insert("1.0", "This consultation is no longer in the history.")
+                return
+            self.history_listbox.selection_set(idx)
+            self.history_listbox.see(idx)
+            entry = self._history_view[idx]
+            result = entry.get('result')
+        detail_text = f"Timestamp: {entry.get('timestamp')}\nSpecialist: {entry.get('specialist')}\n\nQuery:\n{entry.get('query')}\n\nResult:\n{result}"
         self.history_detail.delete("1.0", "end")
         self.history_detail.insert("1.0", detail_text)
 
+    # ---------------------------
+    # Sessions (multi-turn)
+    # ---------------------------
+    def _new_session(self):
+        self.session = Session(specialist=self.role_menu.get())
+        self._refresh_session_menu()
+
+    def _on_specialist_change(self, choice):
+        # a different specialist is a different consultation: don't carry earlier turns over
+        if self.is_processing or not self.session.turns:
+            return
+        if self._menu_choice(self.session.specialist) != choice:
+            self._new_session()
+
+    def _menu_choice(self, specialist):
+        """Menu entry for a stored specialist name (CLI sessions store it without the emoji)"""
+        if specialist in self.specialists:
+            return specialist
+        name = normalize_specialist(specialist)
+        return next((s for s in self.specialists if normalize_specialist(s) == name), None)
+
+    @staticmethod
+    def _session_label(session):
+        # titles can repeat (same minute, same opening words); the id suffix keeps labels unique
+        return f"{session.title} · #{session.id[:6]}"
+
+    def _refresh_session_menu(self):
+        self._session_choices = {self._session_label(s): s.id for s in load_sessions()}
+        self.session_menu.configure(values=["➕ New session"] + list(self._session_choices))
+        self.session_menu.set(self._session_label(self.session) if self.session.turns else "➕ New session")
+        turns = len(self.session.turns) + (1 if self.session.summary else 0)
+        self.session_label.configure(text=f"💬 {turns} earlier turn(s) in context" if turns else "💬 New session")
+
+    def _on_session_select(self, choice):
+        if self.is_processing:
+            return
+        session = get_session(self._session_choices.get(choice))
+        if session is None:
+            self._new_session()
+            return
+        self.session = session
+        choice = self._menu_choice(session.specialist)
+        if choice:
+            self.role_menu.set(choice)   # set() does not fire _on_specialist_change
+        self._refresh_session_menu()
+        if session.turns:
+            last = session.turns[-1]
+            self.output_box.delete("1.0", "end")
+            self.output_box.insert("1.0", last["answer"])
+
+    # ---------------------------
+    # Stats tab (incremental aggregates + columnar export)
+    # ---------------------------
+    def _build_stats_tab(self):
+        frame = self.tabview.tab("Stats")
+        ctk.CTkLabel(frame, text="📊 Usage Statistics", font=ctk.CTkFont(size=15, weight="bold")).pack(anchor="w", padx=12, pady=12)
+        self.stats_text = ctk.CTkTextbox(frame, wrap="word")
+        self.stats_text.pack(fill="both", padx=12, pady=(0,12), expand=True)
+        btn_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        btn_frame.pack(fill="x", padx=12, pady=(0,12))
+        ctk.CTkButton(btn_frame, text="🔄 Refresh", command=self._refresh_stats).pack(side="left", padx=6)
+        ctk.CTkButton(btn_frame, text="📦 Export columnar", command=self._on_columnar_export).pack(side="left", padx=6)
+        # built from history only the first time; afterwards updated per consultation
+        get_stats(load_history)
+        self._refresh_stats()
+
+    def _refresh_stats(self):
+        self.stats_text.delete("1.0", "end")
+        self.stats_text.insert("1.0", "\n\n".join([
+            format_summary(get_stats().summary()),
+            format_profile_latency(profile_latency_summary()),
+            format_flight_snapshot(get_singleflight().snapshot()),
+            format_quota_snapshot(get_scheduler().snapshot()),
+            format_clock_snapshot(self.frame_clock.snapshot()),
+        ]))
+
+    def _on_columnar_export(self):
+        file = filedialog.asksaveasfilename(defaultextension=".parquet", filetypes=[("Parquet","*.parquet"), ("NumPy archive","*.npz")], title="Export History")
+        if not file:
+            return
+        try:
+            saved = export_columnar(load_history(), file)
+            messagebox.showinfo("Exported", f"Saved history columns to: {saved}")
+        except Exception as e:
+            messagebox.showerror("Export Error", str(e))
+
     # ---------------------------
     # Start consultation
     # ---------------------------
@@ -534,59 +697,94 @@ class AyurvedaUltraX10000(ctk.CTk):
 
     def _stop_loader(self):
         self.loader_canvas.place_forget()
-        self._loader_running = False
+        self.frame_clock.unsubscribe("chakra")
 
     def _animate_chakra(self):
-        self._loader_running = True
-        # rotate chakra image
-        def step():
-            if not getattr(self, "_loader_running", False):
-                return
-            self.chakra_angle = (self.chakra_angle + 12) % 360
+        # rotate chakra image (200 degrees per second)
+        def step(dt):
+            self.chakra_angle = (self.chakra_angle + 200 * dt) % 360
             rotated = self.chakra_img.rotate(self.chakra_angle, resample=Image.BICUBIC)
             self.chakra_tk = ImageTk.PhotoImage(rotated)
             self.loader_canvas.delete("all")
             self.loader_canvas.create_image(36,36, image=self.chakra_tk)
-            self.after(60, step)
-        step()
+        self.frame_clock.subscribe("chakra", step, fps=16)
 
     # ---------------------------
     # Agent runner (CrewAI)
     # ---------------------------
     def _run_agent(self, query):
+        started = time.perf_counter()
         try:
             specialist = self.role_menu.get()
-            # create LLM
+            auto_routed = specialist == AUTO_CHOICE
+            if auto_routed:
+                # local classifier, well under a millisecond
+                chosen = route_query(query)
+                specialist = next((s for s in self.specialists if normalize_specialist(s) == chosen), chosen)
+
+            profile = "quick" if self.profile_menu.get().startswith("⚡") else "standard"
+            template = get_prompt(specialist, profile)
+            # compact retrieved facts instead of long free-text backstories
+            context = "\n\n".join(c for c in (retrieve_context(query, specialist), self.session.context()) if c)
+            prompt = template.render(query, context=context)
+
+            estimated = template.request_tokens(prompt)
+
+            def wait_for_quota(tier):
+                # interactive consultations go ahead of background batch work;
+                # runs before the router starts timing the tier
+                get_scheduler().acquire(estimated, priority=PRIORITY_INTERACTIVE)
+
+            def run_crew(llm):
+                agent = Agent(role=specialist, goal=template.goal, backstory=template.backstory, llm=llm)
+                task = Task(agent=agent, description=prompt, expected_output=template.expected_output)
+                crew = Crew(agents=[agent], tasks=[task])
+                try:
+                    result = crew.kickoff()
+                except Exception:
+                    if API_KEY:
+                        # the router retries on another tier and charges again: refund this attempt
+                        get_scheduler().reconcile(estimated, 0)
+                    raise
+                if API_KEY:
+                    # refund the part of the answer budget that was not used
+                    get_scheduler().reconcile(estimated, template.used_tokens(prompt, result))
+                return result
+
+            # identical consultations already in flight (other desks, batch retries) share one call
+            key = consultation_key(specialist, query, profile, context)
             if API_KEY:
-                llm = LLM(model="gemini/gemini-2.5-flash", api_key=API_KEY, temperature=0.7)
+                # router picks the fast or strong tier from query shape + live latency
+                with ProfileTimer(profile) as timer:
+                    def consult():
+                        result, tier = get_router().call(
+                            query, specialist,
+                            lambda tier: run_crew(build_llm(tier, API_KEY, max_tokens=template.max_tokens)),
+                            before=wait_for_quota)
+                        template.check_answer(result)   # empty / truncated is an error, not a result
+                        return str(result), tier.model   # plain values, so other windows can share them
+                    (result, model), shared = get_singleflight().do(key, consult)
+                self.last_timing = f"{timer.elapsed:.1f}s · {profile} · {model}" + (" · shared" if shared else "")
             else:
                 # demo placeholder LLM behavior - returns canned text
                 class DummyLLM:
                     def __init__(self): pass
                     def generate(self, *args, **kwargs): return "Demo: LLM not configured. This is a placeholder response."
-                llm = DummyLLM()
-            agent = Agent(role=specialist, goal="Provide structured Ayurvedic guidance", backstory="Expert Ayurvedic practitioner", llm=llm)
-            task = Task(
-                agent=agent,
-                description=f"""
-Analyze the following symptoms using Ayurvedic principles (Tridosha, Agni, Ama):
-\"\"\"{query}\"\"\"
-
-Return structured output sections with headings and short bullet recommendations.
-""",
-                expected_output="Structured Ayurvedic guidance"
-            )
-            crew = Crew(agents=[agent], tasks=[task])
-            result = crew.kickoff()
+                result, _ = get_singleflight().do(key, lambda: str(run_crew(DummyLLM())))
             output_text = f"🌿 Guidance from {specialist}\n\n{result}\n\n⚠️ Educational Ayurvedic guidance only."
             # store history
             entry = {
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "specialist": specialist,
                 "query": query,
-                "result": output_text
+                "result": output_text,
+                "latency_ms": round((time.perf_counter() - started) * 1000)
             }
+            if auto_routed:
+                entry["auto_routed"] = True
             append_history(entry)
+            self.session.add_turn(query, str(result))
+            save_session(self.session)
             # update UI on main thread
             self.last_result = output_text
             self.last_query = query
@@ -599,15 +797,24 @@ Return structured output sections with headings and short bullet recommendations
         self.is_processing = False
         self._stop_loader()
         self.start_btn.configure(state="normal")
-        self.status_label.configure(text="✅ Consultation complete", text_color=CURRENT_THEME["primary"])
+        status = "✅ Consultation complete"
+        if self.last_timing:
+            status += f"  (⏱️ {self.last_timing})"
+        self.status_label.configure(text=status, text_color=CURRENT_THEME["primary"])
+        # keyword emojis in one pass over the text (display/exports only; history keeps raw text)
+        text = emoji_formatter(text)
         self.output_box.delete("1.0", "end")
         self.output_box.insert("1.0", text)
         # populate other tabs with sections (basic parsing heuristics)
         self._populate_aux_tabs(text)
         self._refresh_history_list()
+        self._refresh_session_menu()
+        self._refresh_stats()
         # preview in report tab
         self.report_preview.delete("1.0", "end")
         self.report_preview.insert("1.0", text)
+        # render the export artifacts now so the download buttons only copy a file
+        self._prerender_reports()
 
     def _on_error(self, err):
         self.is_processing = False
@@ -665,10 +872,35 @@ Return structured output sections with headings and short bullet recommendations
         self.query_box.delete("1.0", "end")
         self.output_box.delete("1.0", "end")
         self.status_label.configure(text="💤 Cleared.", text_color="gray")
+        # the next consultation starts fresh instead of following up on the cleared one
+        if not self.is_processing:
+            self._new_session()
 
     # ---------------------------
     # PDF export & markdown export
     # ---------------------------
+    def _report_jobs(self):
+        """(key, suffix, render) per export artifact of the current result and theme"""
+        specialist, query, result = self.last_specialist, self.last_query, self.last_result
+        theme_name = self.active_theme.get()
+        theme = dict(CURRENT_THEME)
+        pdf_key = artifact_key("pdf", specialist, query, result, theme_name, sorted(theme.items()))
+        md_key = artifact_key("md", result)
+        return {
+            "pdf": (pdf_key, ".pdf", lambda path: save_pdf_report(
+                path, REPORT_TITLE, specialist, query, emoji_formatter(result), theme)),
+            "md": (md_key, ".md", lambda path: Path(path).write_text(emoji_formatter(result), encoding="utf-8")),
+        }
+
+    def _prerender_reports(self):
+        if not self.last_result:
+            return
+        jobs = self._report_jobs()
+        # artifacts of an earlier result or theme are obsolete now
+        self.report_cache.retain(key for key, _, _ in jobs.values())
+        for key, suffix, render in jobs.values():
+            self.report_cache.submit(key, suffix, render)
+
     def _on_pdf_export(self):
         if not self.last_result:
             messagebox.showinfo("PDF Export", "Run a consultation first to export a PDF.")
@@ -677,7 +909,8 @@ Return structured output sections with headings and short bullet recommendations
         if not file:
             return
         try:
-            save_pdf_report(file, "Ayurvedic Consultation Report", self.last_specialist, self.last_query, self.last_result)
+            key, suffix, render = self._report_jobs()["pdf"]
+            self.report_cache.export(key, suffix, file, render)
             messagebox.showinfo("PDF Saved", f"Saved report to: {file}")
         except Exception as e:
             messagebox.showerror("PDF Error", f"Could not save PDF: {e}")
@@ -690,8 +923,8 @@ Return structured output sections with headings and short bullet recommendations
         if not file:
             return
         try:
-            with open(file, "w", encoding="utf-8") as f:
-                f.write(self.last_result)
+            key, suffix, render = self._report_jobs()["md"]
+            self.report_cache.export(key, suffix, file, render)
             messagebox.showinfo("Saved", f"Saved Markdown to: {file}")
         except Exception as e:
             messagebox.showerror("Save Error", str(e))
@@ -3,9 +3,16 @@ AI Ayurvedic Assistant - Interactive CLI
 Specialized Ayurvedic agents powered by CrewAI and Gemini AI
 """
 
-from crewai import Agent, Task, Crew, LLM
-import os
+from crewai import Agent, Task, Crew
 from dotenv import load_dotenv
+from emoji_formatter import emoji_formatter
+from ayurveda_index import retrieve_context
+from model_router import get_router, build_llm, resolve_api_key
+from prompts import get_prompt, ProfileTimer, profile_latency_summary, format_profile_latency
+from rate_limiter import get_scheduler, PRIORITY_INTERACTIVE
+from specialist_router import route_query, AUTO_SPECIALIST
+from sessions import Session, load_sessions, save_session
+from singleflight import get_singleflight, consultation_key
 
 # Load API key
 load_dotenv()
@@ -35,14 +42,15 @@ def get_healthcare_specialist():
         '3': ('Herbal & Remedy Guide', 'Suggest traditional herbs (Dravyaguna) and home remedies'),
         '4': ('Ahara (Diet) Specialist', 'Offer food recommendations specific to Dosha imbalance'),
         '5': ('Yoga & Pranayama Guide', 'Recommend specific Asanas and breathing techniques'),
-        '6': ('Agni & Ama Consultant', 'Analyze digestion (Agni) and toxin (Ama) symptoms')
+        '6': ('Agni & Ama Consultant', 'Analyze digestion (Agni) and toxin (Ama) symptoms'),
+        '7': (AUTO_SPECIALIST, 'Let a local classifier pick the best specialist for your query')
     }
     
     for key, (role, desc) in specialists.items():
         print(f"  {key}. {role:<25} - {desc}")
     
     print()
-    choice = input("Enter your choice (1-6): ").strip() # Adjusted range
+    choice = input("Enter your choice (1-7): ").strip() # Adjusted range
     
     if choice in specialists:
         role, description = specialists[choice]
@@ -51,6 +59,26 @@ def get_healthcare_specialist():
         print("⚠️  Invalid choice. Using default 'Prakriti & Dosha Analyst'")
         return specialists['1']
 
+def get_response_profile():
+    """Let user choose between a full and a quick answer"""
+    print()
+    print("⚡ RESPONSE LENGTH:")
+    print("  1. Standard - structured, detailed guidance")
+    print("  2. Quick    - a few bullet points, faster")
+    choice = input("Enter your choice (1-2, default 1): ").strip()
+    return "quick" if choice == "2" else "standard"
+
+def resume_session():
+    """Offer to continue the most recent saved session"""
+    sessions = load_sessions()
+    if sessions:
+        last = sessions[0]
+        choice = input(f"🔁 Resume your last session ({last.title})? (yes/no): ").strip().lower()
+        if choice in ['yes', 'y']:
+            print(f"\n✅ Resumed session with {len(last.turns)} recent turn(s).\n")
+            return last
+    return Session()
+
 def get_health_query():
     """Get health query from user"""
     print("\n" + "-" * 80)
@@ -77,105 +105,75 @@ def get_health_query():
     
     return ' '.join(lines)
 
-def consult_healthcare_agent(specialist, description, query, api_key):
-    """Execute healthcare consultation"""
+def consult_healthcare_agent(specialist, description, query, api_key, priority=PRIORITY_INTERACTIVE, profile="standard", context=""):
+    """Execute healthcare consultation (batch scripts should pass PRIORITY_BATCH)"""
     print("\n" + "=" * 80)
     print(f"🔍 {specialist.upper()} IS ANALYZING YOUR QUERY...")
     print("=" * 80)
     print()
     
     try:
-        # 4. UPDATED AGENT CONFIGURATIONS FOR AYURVEDA
-        agent_configs = {
-            "Prakriti & Dosha Analyst": {
-                "goal": "Determine the user's innate Prakriti (constitution) and current Dosha imbalance (Vikriti)",
-                "backstory": """You are a highly knowledgeable Ayurvedic expert with deep understanding of 
-                Tridosha theory (Vata, Pitta, Kapha). Your role is to analyze a user's physical and mental 
-                characteristics, lifestyle, and symptoms to accurately assess their fundamental constitution 
-                and identify the current state of Dosha imbalance. You frame all advice based on this analysis."""
-            },
-            "Ayurvedic Lifestyle Advisor": {
-                "goal": "Provide personalized Dinacharya (daily) and Ritucharya (seasonal) recommendations",
-                "backstory": """You are an expert in Ayurvedic lifestyle and routines. You provide detailed guidance 
-                on daily practices (Dinacharya), including waking, cleansing, exercise, and sleep, as well as 
-                seasonal adjustments (Ritucharya) to maintain balance and prevent illness."""
-            },
-            "Herbal & Remedy Guide": {
-                "goal": "Suggest traditional Ayurvedic herbs (Dravyaguna) and practical home remedies",
-                "backstory": """You are a specialist in Ayurvedic pharmacology (Dravyaguna). You suggest common, 
-                safe, and effective herbs, spices, and simple home remedies based on their Rasa (taste), 
-                Virya (potency), and Vipaka (post-digestive effect) to balance the specific Dosha imbalance mentioned."""
-            },
-            "Ahara (Diet) Specialist": {
-                "goal": "Provide personalized Ahara (dietary) guidance to balance the current Dosha imbalance",
-                "backstory": """You are an Ayurvedic nutritionist, expert in the principles of Ahara and its 
-                effect on Agni. You recommend specific Rasa (tastes), cooking methods, and food combinations 
-                that are appropriate for restoring health based on the user's Dosha imbalance (Vikriti)."""
-            },
-            "Yoga & Pranayama Guide": {
-                "goal": "Recommend specific Yoga Asanas, Pranayama, and meditation techniques for physical and mental balance",
-                "backstory": """You are a certified Yoga and Pranayama instructor with knowledge of therapeutic 
-                applications in Ayurveda. You suggest practices that are either calming (Vata/Pitta) or stimulating 
-                (Kapha) to address the root Dosha imbalance and promote physical and mental well-being."""
-            },
-            "Agni & Ama Consultant": {
-                "goal": "Analyze symptoms related to Agni (digestive fire) and Ama (toxins) and suggest cleansing measures",
-                "backstory": """You are an Ayurvedic consultant specializing in digestion. You interpret symptoms 
-                to assess the state of the user's Agni (Mandagni, Tikshnagni, Vishamagni) and the presence of Ama. 
-                You recommend gentle detoxifying measures, fasting protocols, and specific dietary adjustments to rekindle Agni."""
-            }
-        }
-        
-        config = agent_configs.get(specialist, agent_configs["Prakriti & Dosha Analyst"])
-        
-        # Create LLM
-        llm = LLM(
-            model="gemini/gemini-2.5-flash",
-            temperature=0.7,
-            api_key=api_key
-        )
-        
-        # Create healthcare agent
-        agent = Agent(
-            role=specialist,
-            goal=config["goal"],
-            backstory=config["backstory"],
-            verbose=False,
-            llm=llm
-        )
-        
-        # 4. UPDATED TASK INSTRUCTIONS FOR AYURVEDA
-        task = Task(
-            description=f"""
-            As a {specialist}, analyze the following health query from a purely **Ayurvedic perspective**:
+        # Precompiled, budgeted prompt for this specialist/profile
+        template = get_prompt(specialist, profile)
+        reference = retrieve_context(query, specialist)
+        prompt = template.render(query, context="\n\n".join(c for c in (reference, context) if c))
+        
+        estimated = template.request_tokens(prompt)
+        
+        def wait_for_quota(tier):
+            """Wait for a slot in the shared Gemini quota (not timed as model latency)"""
+            get_scheduler().acquire(estimated, priority=priority)
+        
+        def run_crew(tier):
+            """Build and run the crew on the tier chosen by the model router"""
+            # Create healthcare agent
+            agent = Agent(
+                role=specialist,
+                goal=template.goal,
+                backstory=template.backstory,
+                verbose=False,
+                llm=build_llm(tier, api_key, max_tokens=template.max_tokens)
+            )
+            
+            task = Task(
+                description=prompt,
+                agent=agent,
+                expected_output=template.expected_output
+            )
             
-            QUERY: {query}
+            # Create and run crew
+            crew = Crew(
+                agents=[agent],
+                tasks=[task],
+                verbose=False
+            )
             
-            INSTRUCTIONS:
-            1. Base the analysis on **Tridosha theory** (Vata, Pitta, Kapha) and the state of **Agni** and **Ama**.
-            2. Suggest the likely **Dosha imbalance (Vikriti)** causing the symptoms.
-            3. Provide actionable, personalized recommendations for **Ahara (diet), Vihara (lifestyle)**, and 
-               **Dravyaguna (herbs/spices)** to restore balance.
-            4. Explain the reasoning using Ayurvedic terminology (e.g., 'pitta-pacifying,' 'kapha-aggravating').
-            5. Strictly adhere to the disclaimer—this is for informational, educational purposes in the context of traditional Ayurveda.
-            6. Be compassionate and supportive in tone.
+            try:
+                result = crew.kickoff()
+            except Exception:
+                # the router retries on another tier and charges again: refund this attempt
+                get_scheduler().reconcile(estimated, 0)
+                raise
             
-            Provide a comprehensive, well-structured response following these principles.
-            """,
-            agent=agent,
-            expected_output="Comprehensive Ayurvedic guidance based on Dosha analysis, diet, and lifestyle recommendations."
-        )
+            # Refund the part of the answer budget that was not used
+            get_scheduler().reconcile(estimated, template.used_tokens(prompt, result))
+            
+            return result
         
-        # Create and run crew
-        crew = Crew(
-            agents=[agent],
-            tasks=[task],
-            verbose=False
-        )
+        def consult():
+            result, tier = get_router().call(query, specialist, run_crew, before=wait_for_quota)
+            template.check_answer(result)   # empty / truncated is an error, not a result
+            return str(result), tier.model   # plain values, so other processes can share them
         
-        result = crew.kickoff()
+        # Route to the fast or strong model tier; an identical consultation
+        # already in flight here or in another window/script is joined instead of re-run
+        key = consultation_key(specialist, query, profile, context)
+        with ProfileTimer(profile) as timer:
+            (result, model), shared = get_singleflight().do(key, consult)
+        print(f"⏱️  {timer.elapsed:.1f}s ({profile} profile, {model})"
+              + (" - joined an identical consultation in flight" if shared else ""))
         
-        return True, str(result)
+        return True, result
         
     except Exception as e:
         return False, f"Error: {str(e)}\nPlease check your internet connection and API key."
@@ -189,7 +187,7 @@ def display_consultation_result(success, result, specialist):
         print("❌ ERROR:")
     print("=" * 80)
     print()
-    print(result)
+    print(emoji_formatter(result) if success else result)
     print()
     print("=" * 80)
     if success:
@@ -201,22 +199,29 @@ def display_consultation_result(success, result, specialist):
 
 def main():
     """Main program loop"""
-    # Check API key
-    api_key = os.getenv("GOOGLE_API_KEY")
+    # Check API key (not needed when VEDACARE_LLM_BASE_URL points at the mock server)
+    api_key = resolve_api_key()
     
     if not api_key:
         print("\n❌ ERROR: GOOGLE_API_KEY not found!")
         print("\nPlease ensure .env file exists with your API key.")
         print("Format: GOOGLE_API_KEY=your-key-here")
+        print("Offline: run mock_llm_server.py and set VEDACARE_LLM_BASE_URL=http://127.0.0.1:8765")
         return
     
     print_header()
     
+    session = resume_session()
+    follow_up = False
+    
     while True:
-        # Get specialist
-        specialist, description = get_healthcare_specialist()
-        print(f"\n✅ Selected: {specialist}")
-        print(f"   {description}")
+        if not follow_up:
+            # Get specialist
+            specialist, description = get_healthcare_specialist()
+            print(f"\n✅ Selected: {specialist}")
+            print(f"   {description}")
+            
+            profile = get_response_profile()
         
         # Get query
         query = get_health_query()
@@ -225,22 +230,41 @@ def main():
             print("\n⚠️  No query entered. Please try again.")
             continue
         
-        # Run consultation
-        success, result = consult_healthcare_agent(specialist, description, query, api_key)
+        active = specialist
+        if specialist == AUTO_SPECIALIST:
+            active = route_query(query)
+            print(f"\n🤖 Auto-selected: {active}")
+        
+        # Run consultation (earlier turns go in as a bounded summary)
+        success, result = consult_healthcare_agent(active, description, query, api_key,
+                                                   profile=profile, context=session.context())
         
         # Display result
-        display_consultation_result(success, result, specialist)
+        display_consultation_result(success, result, active)
+        
+        if success:
+            session.specialist = session.specialist or active
+            session.add_turn(query, result)
+            save_session(session)
         
         # Ask to continue
         print("\n" + "-" * 80)
-        continue_choice = input("Would you like another consultation? (yes/no): ").strip().lower()
+        continue_choice = input("Ask a follow-up (f), start a new consultation (n), or quit (q)? ").strip().lower()
+        
+        if continue_choice in ['f', 'follow-up', 'followup']:
+            follow_up = True
+            continue
         
-        if continue_choice not in ['yes', 'y']:
+        if continue_choice not in ['n', 'new', 'yes', 'y']:
+            print()
+            print(format_profile_latency(profile_latency_summary()))
             print("\n👋 Thank you for using AI Ayurvedic Assistant!")
             print("Stay healthy and take care!")
             print("=" * 80)
             break
         
+        session = Session()
+        follow_up = False
         print("\n\n")
 
 if __name__ == "__main__":
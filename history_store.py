@@ -0,0 +1,346 @@
+"""
+Compact Consultation History
+consult_history.json loaded as small __slots__ records: specialist names interned,
+timestamps as integers and each multi-KB `result` left in the file, decoded from
+its byte span only when something actually reads it
+"""
+
+import os
+import re
+import sys
+import json
+import mmap
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+HISTORY_FILE = Path("consult_history.json")
+DEFAULT_HISTORY_LIMIT = 200   # newest entries kept on disk (override via .env: VEDACARE_HISTORY_LIMIT)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+_EPOCH = datetime(1970, 1, 1)
+
+# JSON tokens: a string (unrolled loop, no backtracking), a bare scalar
+# (number / true / false / null), or structural characters
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_SCALAR = rb'[^\s\[\]{}:,"]+'
+_TOKEN_RE = re.compile(rb'\s*(?:(' + _STRING + rb')|([\[\]{}:,])|(' + _SCALAR + rb'))', re.S)
+# one `"key": value` member per match; group 2 = string, 3 = scalar, 4 = nested opener
+_MEMBER_RE = re.compile(rb'\s*,?\s*(' + _STRING + rb')\s*:\s*(?:(' + _STRING + rb')|(' + _SCALAR + rb')|([\[{]))', re.S)
+_ARRAY_RE = re.compile(rb'\s*\[')
+_ITEM_RE = re.compile(rb'\s*,?\s*([{\]])')
+_CLOSE_RE = re.compile(rb'\s*}')
+
+
+def history_limit() -> int:
+    # read lazily so values from .env (loaded by the apps) apply
+    return int(os.getenv("VEDACARE_HISTORY_LIMIT", DEFAULT_HISTORY_LIMIT))
+
+
+class StaleHistoryError(RuntimeError):
+    """The history file was rewritten after these records were loaded"""
+
+
+def parse_timestamp(text) -> int:
+    """'2025-01-31 18:05:09' -> wall-clock seconds since 1970 (no timezone, exact round trip)"""
+    try:
+        dt = datetime(int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                      int(text[11:13]), int(text[14:16]), int(text[17:19]))
+    except (TypeError, ValueError):
+        return 0
+    return int((dt - _EPOCH).total_seconds())
+
+def format_timestamp(seconds: int) -> str:
+    return (_EPOCH + timedelta(seconds=seconds)).strftime(TIMESTAMP_FORMAT) if seconds else ""
+
+
+class HistoryRecord:
+    """
+    One consultation. Reads like the old dict entries through get(), so code
+    written for load_history()'s dicts keeps working; `result` is read from
+    the backing file on access.
+    """
+
+    __slots__ = ("ts", "specialist", "query", "latency_ms", "auto_routed",
+                 "_store", "_start", "_end", "extra")
+
+    def __init__(self, ts, specialist, query, latency_ms, auto_routed, store, start, end, extra=None):
+        self.ts = ts
+        self.specialist = specialist
+        self.query = query
+        self.latency_ms = latency_ms
+        self.auto_routed = auto_routed
+        self._store = store
+        self._start = start
+        self._end = end
+        self.extra = extra
+
+    @property
+    def timestamp(self) -> str:
+        return format_timestamp(self.ts)
+
+    @property
+    def result(self) -> str:
+        if self._start < 0:
+            return ""
+        return self._store.read_span(self._start, self._end)
+
+    def get(self, key, default=None):
+        if key in ("timestamp", "specialist", "query", "result"):
+            return getattr(self, key)
+        if key == "latency_ms":
+            return default if self.latency_ms is None else self.latency_ms
+        if key == "auto_routed":
+            return self.auto_routed or default
+        return (self.extra or {}).get(key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key, KeyError)
+        if value is KeyError:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self) -> dict:
+        entry = {"timestamp": self.timestamp, "specialist": self.specialist,
+                 "query": self.query, "result": self.result}
+        if self.latency_ms is not None:
+            entry["latency_ms"] = self.latency_ms
+        if self.auto_routed:
+            entry["auto_routed"] = True
+        entry.update(self.extra or {})
+        return entry
+
+
+class HistoryStore:
+    """Newest-first sequence of HistoryRecord backed by one history file"""
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = Path(path)
+        self.records = []
+        self.spans = []           # byte span of every entry object, for append()
+        self.signature = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def __iter__(self):
+        return iter(self.records)
+
+    # ---------------------------
+    # Loading
+    # ---------------------------
+    @staticmethod
+    def _signature(path):
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    @classmethod
+    def load(cls, path=HISTORY_FILE):
+        store = cls(path)
+        try:
+            store.signature = cls._signature(store.path)
+        except OSError:
+            return store
+        if store.signature[1] == 0:
+            return store
+        with open(store.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            names = {}
+            for obj_start, obj_end, fields in _scan_entries(buf):
+                store.spans.append((obj_start, obj_end))
+                store.records.append(store._record(buf, fields, names))
+        return store
+
+    def _record(self, buf, fields, names):
+        def value(key, default=None):
+            span = fields.pop(key, None)
+            if span is None:
+                return default
+            raw = buf[span[0]:span[1]]
+            return _decode_string(raw) if raw[:1] == b'"' else json.loads(raw)
+
+        specialist = value("specialist", "")
+        # one shared string per specialist instead of one copy per entry
+        specialist = names.setdefault(specialist, sys.intern(specialist))
+        start, end = fields.pop("result", (-1, -1))
+        return HistoryRecord(
+            ts=parse_timestamp(value("timestamp", "")),
+            specialist=specialist,
+            query=value("query", ""),
+            latency_ms=value("latency_ms"),
+            auto_routed=bool(value("auto_routed", False)),
+            store=self, start=start, end=end,
+            extra={k: json.loads(buf[s:e]) for k, (s, e) in fields.items()} or None,
+        )
+
+    # ---------------------------
+    # Lazy access
+    # ---------------------------
+    def is_stale(self) -> bool:
+        try:
+            return self._signature(self.path) != self.signature
+        except OSError:
+            return True
+
+    def read_span(self, start, end) -> str:
+        if self.is_stale():
+            raise StaleHistoryError(f"{self.path} changed since it was loaded; reload the history")
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return json.loads(f.read(end - start))
+
+    # ---------------------------
+    # Appending (splices bytes; existing results are never decoded)
+    # ---------------------------
+    def append(self, entry: dict, limit=None):
+        """Write `entry` as the newest item, keeping at most `limit` entries"""
+        if limit is None:
+            limit = history_limit()
+        new = json.dumps([entry], ensure_ascii=False, indent=2)[2:-2].encode("utf-8")
+        kept = self.spans[:max(0, limit - 1)]
+        parts = [b"[\n", new]
+        if kept:
+            if self.is_stale():
+                raise StaleHistoryError(f"{self.path} changed since it was loaded; reload the history")
+            with open(self.path, "rb") as f:
+                f.seek(kept[0][0])
+                parts += [b",\n  ", f.read(kept[-1][1] - kept[0][0])]
+        parts.append(b"\n]")
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(tmp, self.path)
+
+
+def _scan_entries(buf):
+    """
+    Yield (start, end, {key: (value_start, value_end)}) for each object in
+    the top-level JSON array. Only token boundaries are found here; values
+    are decoded by the caller, so large strings are never copied.
+    """
+    m = _ARRAY_RE.match(buf)
+    if not m:
+        raise ValueError("history file is not a JSON array")
+    pos = m.end()
+    while True:
+        m = _ITEM_RE.match(buf, pos)
+        if not m:
+            raise ValueError(f"expected an object at byte {pos}")
+        if m.group(1) == b"]":
+            return
+        obj_start, pos = m.start(1), m.end()
+        fields = {}
+        while True:
+            m = _MEMBER_RE.match(buf, pos)
+            if not m:
+                close = _CLOSE_RE.match(buf, pos)
+                if not close:
+                    raise ValueError(f"malformed entry at byte {pos}")
+                pos = close.end()
+                break
+            key = _decode_string(m.group(1))
+            grp = m.lastindex
+            if grp == 4:
+                fields[key] = (m.start(4), _skip_nested(buf, m.end()))
+                pos = fields[key][1]
+            else:
+                fields[key] = (m.start(grp), m.end(grp))
+                pos = m.end()
+        yield obj_start, pos, fields
+
+def _decode_string(raw: bytes) -> str:
+    # keys and names rarely contain escapes; skip the JSON decoder when they don't
+    return raw[1:-1].decode("utf-8") if b"\\" not in raw else json.loads(raw)
+
+def _skip_nested(buf, pos):
+    depth = 1
+    while depth:
+        m = _TOKEN_RE.match(buf, pos)
+        pos = m.end()
+        if m.group(2) in (b"{", b"["):
+            depth += 1
+        elif m.group(2) in (b"}", b"]"):
+            depth -= 1
+    return pos
+
+
+# ---------------------------
+# Shared instance (rescanned only when the file changes)
+# ---------------------------
+_store = None
+_store_lock = threading.Lock()
+
+def _current_store(path):
+    """Caller holds _store_lock"""
+    global _store
+    if _store is None or _store.path != Path(path) or _store.is_stale():
+        try:
+            _store = HistoryStore.load(path)
+        except (ValueError, AttributeError, UnicodeDecodeError):
+            _store = HistoryStore(path)   # unreadable file: start empty, as before
+    return _store
+
+def load_history(path=HISTORY_FILE) -> HistoryStore:
+    with _store_lock:
+        return _current_store(path)
+
+def append_history(entry: dict, path=HISTORY_FILE, limit=None):
+    with _store_lock:
+        try:
+            _current_store(path).append(entry, limit)
+        except StaleHistoryError:
+            # another process rewrote the file between the check and the splice
+            _current_store(path).append(entry, limit)
+
+
+if __name__ == "__main__":
+    import gc
+    import random
+    import tempfile
+    import time
+    import tracemalloc
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    specialists = ["🧬 Prakriti & Dosha Analyst", "🌿 Herbal & Remedy Guide", "🍃 Ahara (Diet) Specialist",
+                   "🕉 Yoga & Pranayama Guide", "🔥 Agni & Ama Consultant", "🧘 Ayurvedic Lifestyle Advisor"]
+    paragraph = ("Favour warm, cooked meals and sip ginger tea before lunch. Abhyanga with sesame oil "
+                 "calms Vata; Triphala at bedtime supports digestion. ")
+    rng = random.Random(7)
+    history = [{
+        "timestamp": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00:00",
+        "specialist": rng.choice(specialists),
+        "query": "I have bloating, dry skin and light sleep " + str(i),
+        "result": "🌿 Guidance\n\n" + paragraph * rng.randint(15, 35),
+        "latency_ms": rng.randint(900, 9000),
+    } for i in range(n)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "consult_history.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(history, f, ensure_ascii=False, indent=2)
+        del history
+        gc.collect()
+        print(f"{n:,} consultations, {path.stat().st_size / 1e6:.1f} MB on disk")
+
+        def measure(label, loader):
+            gc.collect()
+            start = time.perf_counter()
+            loader()
+            elapsed = time.perf_counter() - start
+            gc.collect()
+            tracemalloc.start()
+            data = loader()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{label:<16} {current / 1e6:8.1f} MB held  {peak / 1e6:8.1f} MB peak  {elapsed:6.2f}s load")
+            return data
+
+        def load_dicts():
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        dicts = measure("list of dicts", load_dicts)
+        store = measure("HistoryStore", lambda: HistoryStore.load(path))
+        same = all(r.to_dict() == d for r, d in zip(store, dicts)) and len(store) == len(dicts)
+        print(f"Records identical to json.load(): {same}")
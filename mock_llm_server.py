@@ -0,0 +1,322 @@
+"""
+Mock Gemini Server
+Local stand-in for the Gemini REST API (generateContent / streamGenerateContent) for offline
+load and latency testing: configurable latency, token streaming, 429/5xx injection, record/replay
+
+Point both apps at it with one setting in .env:
+    VEDACARE_LLM_BASE_URL=http://127.0.0.1:8765
+
+    python mock_llm_server.py --latency lognormal:0.2,0.5 --tps 80 --error-rate 0.05
+    python mock_llm_server.py --record recordings.json   # proxy to real Gemini and save answers
+"""
+
+import os
+import re
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prompts import estimate_tokens
+
+UPSTREAM = "https://generativelanguage.googleapis.com"
+DEFAULT_PORT = 8765
+
+_ERRORS = {
+    429: ("RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota)."),
+    500: ("INTERNAL", "An internal error has occurred."),
+    503: ("UNAVAILABLE", "The model is overloaded. Please try again later."),
+}
+
+
+# ---------------------------
+# Latency distributions
+# ---------------------------
+class Latency:
+    """
+    Parses "fixed:S", "uniform:LO,HI", "normal:MEAN,STD" or "lognormal:MU,SIGMA"
+    (seconds; lognormal parameters are of ln(seconds)) and samples from it.
+    """
+
+    def __init__(self, spec="fixed:0", rng=None):
+        self.spec = spec
+        kind, _, args = spec.partition(":")
+        self.kind = kind
+        self.args = [float(a) for a in args.split(",") if a] or [0.0]
+        self._rng = rng or random.Random()
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self) -> float:
+        a = self.args
+        if self.kind == "fixed":
+            return a[0]
+        if self.kind == "uniform":
+            return self._rng.uniform(a[0], a[1])
+        if self.kind == "normal":
+            return max(0.0, self._rng.gauss(a[0], a[1]))
+        return self._rng.lognormvariate(a[0], a[1])
+
+
+# ---------------------------
+# Replay store
+# ---------------------------
+_BANNER = re.compile(r"^🌿 Guidance from .*?\n+", re.DOTALL)
+_DISCLAIMER = "⚠️ Educational Ayurvedic guidance only."
+
+class ReplayStore:
+    """
+    Canned answers from consult_history.json ({query, result}) or from a
+    recordings file ({prompt, response}). A request gets the answer whose
+    query appears in its prompt, otherwise a deterministic pick.
+    """
+
+    def __init__(self, paths=()):
+        self.pairs = []
+        self._lock = threading.Lock()
+        for path in paths:
+            self.load(path)
+
+    def load(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for e in entries:
+            if "response" in e:
+                self.pairs.append((e.get("prompt", ""), e["response"]))
+            elif "result" in e:
+                answer = _BANNER.sub("", e["result"], count=1).replace(_DISCLAIMER, "").strip()
+                self.pairs.append((e.get("query", ""), answer))
+
+    def answer(self, prompt: str) -> str:
+        if not self.pairs:
+            return "Mock response: Vata, Pitta and Kapha are in balance. Drink warm water and rest."
+        lower = prompt.lower()
+        for key, answer in self.pairs:
+            if key and key.lower() in lower:
+                return answer
+        return self.pairs[sum(map(ord, prompt)) % len(self.pairs)][1]
+
+    def record(self, path, prompt, response):
+        with self._lock:
+            self.pairs.append((prompt, response))
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+            except (OSError, ValueError):
+                saved = []
+            saved.append({"prompt": prompt, "response": response})
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(saved, f, ensure_ascii=False, indent=2)
+
+
+# ---------------------------
+# HTTP handler
+# ---------------------------
+class MockGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        if not self.server.quiet:
+            super().log_message(fmt, *args)
+
+    def do_GET(self):
+        if urlparse(self.path).path in ("/", "/health", "/stats"):
+            self._send_json(200, self.server.snapshot())
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        model, _, method = path.rpartition("/")[2].partition(":")
+        if method not in ("generateContent", "streamGenerateContent"):
+            self._send_json(404, {"error": {"code": 404, "message": f"Unknown method {path}", "status": "NOT_FOUND"}})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"code": 400, "message": "Invalid JSON", "status": "INVALID_ARGUMENT"}})
+            return
+        srv = self.server
+        srv.count("requests")
+        prompt = "\n".join(
+            part.get("text", "")
+            for content in body.get("contents", []) + [body.get("systemInstruction") or {}]
+            for part in content.get("parts", [])
+        )
+        time.sleep(srv.latency.sample())  # time to first token
+
+        status = srv.pick_fault()
+        if status:
+            srv.count(f"injected_{status}")
+            code, message = _ERRORS[status]
+            self._send_json(status, {"error": {"code": status, "message": message, "status": code}})
+            return
+
+        text = srv.fetch_upstream(path, body, prompt) if srv.record_path else srv.replay.answer(prompt)
+        max_tokens = (body.get("generationConfig") or {}).get("maxOutputTokens")
+        words = text.split(" ")
+        finish_reason = "STOP"
+        if max_tokens and len(words) > max(1, int(max_tokens * 0.75)):
+            # ~0.75 words per token; cut off like the real API does
+            words = words[:max(1, int(max_tokens * 0.75))]
+            finish_reason = "MAX_TOKENS"
+        usage = {
+            "promptTokenCount": estimate_tokens(prompt),
+            "candidatesTokenCount": estimate_tokens(" ".join(words)),
+        }
+        usage["totalTokenCount"] = usage["promptTokenCount"] + usage["candidatesTokenCount"]
+
+        if method == "streamGenerateContent":
+            self._stream(model, words, usage, finish_reason)
+        else:
+            if srv.tokens_per_second:
+                time.sleep(usage["candidatesTokenCount"] / srv.tokens_per_second)
+            self._send_json(200, _response(model, " ".join(words), usage, finish_reason))
+        srv.count("completed")
+
+    def _stream(self, model, words, usage, finish_reason):
+        srv = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        step = srv.chunk_words
+        for i in range(0, len(words), step):
+            piece = " ".join(words[i:i + step]) + (" " if i + step < len(words) else "")
+            last = i + step >= len(words)
+            chunk = _response(model, piece, usage if last else None, finish_reason if last else None)
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\r\n\r\n".encode("utf-8"))
+            self.wfile.flush()
+            if srv.tokens_per_second and not last:
+                time.sleep(estimate_tokens(piece) / srv.tokens_per_second)
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _response(model, text, usage, finish_reason):
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finish_reason:
+        candidate["finishReason"] = finish_reason
+    payload = {"candidates": [candidate], "modelVersion": model}
+    if usage:
+        payload["usageMetadata"] = usage
+    return payload
+
+
+class MockGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency="fixed:0", tokens_per_second=0.0, chunk_words=3,
+                 error_rate=0.0, rate_limit_rate=0.0, replay_paths=("consult_history.json",),
+                 record_path=None, upstream=UPSTREAM, seed=None, quiet=False):
+        super().__init__(address, MockGeminiHandler)
+        self.rng = random.Random(seed)
+        self.latency = Latency(latency, self.rng)
+        self.tokens_per_second = tokens_per_second
+        self.chunk_words = max(1, chunk_words)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.replay = ReplayStore(replay_paths)
+        self.record_path = record_path
+        self.upstream = upstream.rstrip("/")
+        self.quiet = quiet
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {"latency": self.latency.spec, "tokens_per_second": self.tokens_per_second,
+                    "replay_answers": len(self.replay.pairs), **self.counters}
+
+    def pick_fault(self):
+        with self._lock:
+            r = self.rng.random()
+        if r < self.rate_limit_rate:
+            return 429
+        if r < self.rate_limit_rate + self.error_rate:
+            return self.rng.choice((500, 503))
+        return None
+
+    def fetch_upstream(self, path, body, prompt):
+        """Record mode: ask the real API (non-streaming) and keep the answer for replay"""
+        method_path = path.replace(":streamGenerateContent", ":generateContent")
+        req = urllib.request.Request(
+            self.upstream + method_path, data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json", "x-goog-api-key": os.getenv("GOOGLE_API_KEY", "")},
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=120) as resp:
+                data = json.load(resp)
+            text = "".join(p.get("text", "") for p in data["candidates"][0]["content"]["parts"])
+        except (urllib.error.URLError, KeyError, IndexError, ValueError) as e:
+            self.count("upstream_errors")
+            return f"Upstream error while recording: {e}"
+        self.replay.record(self.record_path, prompt, text)
+        return text
+
+
+def start_in_thread(**kwargs) -> MockGeminiServer:
+    """Start a server on a free port in a background thread (handy for scripts/tests)"""
+    server = MockGeminiServer(("127.0.0.1", kwargs.pop("port", 0)), quiet=True, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Gemini-compatible mock server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", default="fixed:0.2",
+                        help="fixed:S | uniform:LO,HI | normal:MEAN,STD | lognormal:MU,SIGMA (seconds)")
+    parser.add_argument("--tps", type=float, default=60.0, help="output tokens per second (0 = instant)")
+    parser.add_argument("--chunk-words", type=int, default=3, help="words per streamed chunk")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500/503 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--replay", nargs="*", default=["consult_history.json"],
+                        help="history or recordings files to replay answers from")
+    parser.add_argument("--record", metavar="FILE", help="proxy to real Gemini and save answers to FILE")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = MockGeminiServer(
+        (args.host, args.port), latency=args.latency, tokens_per_second=args.tps,
+        chunk_words=args.chunk_words, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, replay_paths=args.replay,
+        record_path=args.record, seed=args.seed,
+    )
+    print(f"🧪 Mock Gemini listening on {server.base_url}  ({len(server.replay.pairs)} replay answers)")
+    print(f"   Set VEDACARE_LLM_BASE_URL={server.base_url} to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Mock server stopped.")
+
+
+if __name__ == "__main__":
+    main()
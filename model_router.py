@@ -0,0 +1,314 @@
+"""
+Latency-aware Model Router
+Sends short lookups to a fast Gemini tier and long multi-symptom analyses to a stronger one,
+shifting traffic away from any tier that breaks its latency SLO or keeps failing
+"""
+
+import os
+import re
+import time
+import threading
+from collections import deque
+
+# ---------------------------
+# Routing knobs
+# ---------------------------
+LONG_QUERY_CHARS = 280          # queries longer than this count as "analysis"
+MULTI_SYMPTOM_COUNT = 3         # ...as do queries listing this many symptoms
+EWMA_ALPHA = 0.3                # weight of the newest latency sample
+ERROR_RATE_LIMIT = 0.5          # EWMA error rate above which a tier is avoided
+COOLDOWN_SECONDS = 30.0         # how long a tripped tier is skipped before a probe
+WINDOW = 50                     # latency samples kept per tier for percentiles
+
+# Specialists whose answers need the stronger model regardless of query length
+ANALYSIS_SPECIALISTS = {"Prakriti & Dosha Analyst", "Agni & Ama Consultant"}
+
+
+def normalize_specialist(name: str) -> str:
+    """Strip the GUI's emoji prefix so GUI and CLI names compare equal"""
+    return re.sub(r"^[^A-Za-z]+", "", name or "").strip()
+
+
+class ModelTier:
+    """One model configuration the router can send traffic to (ordered fastest -> strongest)"""
+
+    def __init__(self, name, model, temperature=0.7, latency_slo=10.0, thinking_budget=None):
+        self.name = name
+        self.model = model
+        self.temperature = temperature
+        self.latency_slo = latency_slo
+        # Gemini 2.5 "thinking" tokens count against maxOutputTokens; None = model default
+        self.thinking_budget = thinking_budget
+
+    def __repr__(self):
+        return f"ModelTier({self.name!r}, {self.model!r}, slo={self.latency_slo}s)"
+
+
+class TierStats:
+    """Live latency / error statistics for one tier"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.ewma_latency = None
+        self.error_rate = 0.0
+        self.tripped_until = 0.0
+        self.samples = deque(maxlen=WINDOW)
+
+    def record(self, latency, ok):
+        self.calls += 1
+        if ok:
+            self.samples.append(latency)
+            if self.ewma_latency is None:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma_latency
+        else:
+            self.errors += 1
+        self.error_rate = EWMA_ALPHA * (0.0 if ok else 1.0) + (1 - EWMA_ALPHA) * self.error_rate
+
+    def recover(self, latency):
+        """A probe came back healthy: restart the averages from it instead of decaying old spikes"""
+        self.ewma_latency = latency
+        self.error_rate = 0.0
+
+    def percentile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ModelRouter:
+    """
+    Picks a tier per request.
+
+    Short lookups prefer the first (fastest) tier, long or multi-symptom
+    analyses and the analysis specialists prefer the last (strongest) one.
+    A tier whose EWMA latency exceeds its SLO, or whose error rate is too
+    high, is tripped for COOLDOWN_SECONDS; traffic goes to the nearest
+    healthy tier and a single probe request is let through afterwards. A
+    probe that succeeds within the SLO resets the tier's averages, so one
+    spike costs one cooldown rather than however long the EWMA takes to decay.
+    """
+
+    def __init__(self, tiers, clock=time.monotonic):
+        if not tiers:
+            raise ValueError("ModelRouter needs at least one tier")
+        self.tiers = list(tiers)
+        self.stats = {t.name: TierStats() for t in self.tiers}
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # Routing
+    # ---------------------------
+    def is_complex(self, query, specialist=""):
+        if normalize_specialist(specialist) in ANALYSIS_SPECIALISTS:
+            return True
+        if len(query) > LONG_QUERY_CHARS:
+            return True
+        symptoms = [s for s in re.split(r",|;|\.|\band\b|\n", query) if s.strip()]
+        return len(symptoms) >= MULTI_SYMPTOM_COUNT
+
+    def choose(self, query, specialist=""):
+        """Return the tier that should serve this request"""
+        preferred = len(self.tiers) - 1 if self.is_complex(query, specialist) else 0
+        # nearest tiers first, ties broken towards the stronger model
+        order = sorted(range(len(self.tiers)), key=lambda i: (abs(i - preferred), -i))
+        now = self._clock()
+        with self._lock:
+            for i in order:
+                if self._healthy(self.tiers[i], now):
+                    return self.tiers[i]
+            # everything is degraded: use whichever tier is currently quickest
+            return min(self.tiers, key=lambda t: self.stats[t.name].ewma_latency or 0.0)
+
+    def record(self, tier, latency, ok=True):
+        """Feed an observed call back into the tier's statistics"""
+        with self._lock:
+            st = self.stats[tier.name]
+            st.record(latency, ok)
+            if st.tripped_until > 0 and ok and latency <= tier.latency_slo:
+                st.recover(latency)
+            too_slow = st.ewma_latency is not None and st.ewma_latency > tier.latency_slo
+            if too_slow or st.error_rate > ERROR_RATE_LIMIT:
+                st.tripped_until = self._clock() + COOLDOWN_SECONDS
+            else:
+                st.tripped_until = 0.0
+
+    def call(self, query, specialist, fn, before=None):
+        """
+        Run fn(tier) on the chosen tier, timing it. If it raises, the error is
+        recorded and the request is retried once on the next choice.
+        before(tier), e.g. waiting for the local quota, runs outside the timed
+        region so queueing never counts as model latency.
+        Returns (result, tier).
+        """
+        tried = set()
+        last_error = None
+        for _ in range(min(2, len(self.tiers))):
+            tier = self.choose(query, specialist)
+            if tier.name in tried:
+                tier = next((t for t in self.tiers if t.name not in tried), tier)
+            tried.add(tier.name)
+            if before is not None:
+                before(tier)
+            start = self._clock()
+            try:
+                result = fn(tier)
+            except Exception as e:
+                self.record(tier, self._clock() - start, ok=False)
+                last_error = e
+                continue
+            self.record(tier, self._clock() - start, ok=True)
+            return result, tier
+        raise last_error
+
+    def _healthy(self, tier, now):
+        st = self.stats[tier.name]
+        if st.tripped_until <= 0:
+            return True
+        if now >= st.tripped_until:
+            # half-open: let one probe through, re-trip until it reports back
+            st.tripped_until = now + COOLDOWN_SECONDS
+            return True
+        return False
+
+    def snapshot(self):
+        """Per-tier stats for status displays / logging"""
+        now = self._clock()
+        with self._lock:
+            return {
+                t.name: {
+                    "model": t.model,
+                    "calls": self.stats[t.name].calls,
+                    "errors": self.stats[t.name].errors,
+                    "ewma_latency": self.stats[t.name].ewma_latency,
+                    "p95_latency": self.stats[t.name].percentile(0.95),
+                    "tripped": self.stats[t.name].tripped_until > now,
+                }
+                for t in self.tiers
+            }
+
+
+# ---------------------------
+# Stub model for offline testing
+# ---------------------------
+class StubModel:
+    """
+    Stand-in for an LLM with scripted behaviour. `latencies` is cycled; an
+    entry that is an Exception instance is raised instead of sleeping.
+
+        stubs = {"fast": StubModel([0.1, 0.1, 20.0]), "strong": StubModel([2.0])}
+        router.call(query, spec, lambda tier: stubs[tier.name](query))
+    """
+
+    def __init__(self, latencies, reply="stub response", sleep=time.sleep):
+        self.latencies = list(latencies)
+        self.reply = reply
+        self.calls = 0
+        self._sleep = sleep
+
+    def __call__(self, prompt=""):
+        step = self.latencies[self.calls % len(self.latencies)]
+        self.calls += 1
+        if isinstance(step, Exception):
+            raise step
+        self._sleep(step)
+        return self.reply
+
+
+# ---------------------------
+# Default tiers (override via .env) and LLM factory
+# ---------------------------
+MOCK_API_KEY = "mock-key"
+
+def default_tiers():
+    """Tiers from the environment (read lazily, after the apps call load_dotenv())"""
+    # 0 turns thinking off on 2.5 Flash / Flash-Lite (2.5 Pro needs at least 128)
+    thinking = int(os.getenv("VEDACARE_THINKING_BUDGET", "0"))
+    return [
+        ModelTier("fast", os.getenv("VEDACARE_FAST_MODEL", "gemini/gemini-2.5-flash-lite"),
+                  temperature=0.7, latency_slo=float(os.getenv("VEDACARE_FAST_SLO", "8")),
+                  thinking_budget=thinking),
+        ModelTier("strong", os.getenv("VEDACARE_STRONG_MODEL", "gemini/gemini-2.5-flash"),
+                  temperature=0.7, latency_slo=float(os.getenv("VEDACARE_STRONG_SLO", "30")),
+                  thinking_budget=thinking),
+    ]
+
+def llm_base_url():
+    """VEDACARE_LLM_BASE_URL points every LLM call at a local mock server"""
+    return os.getenv("VEDACARE_LLM_BASE_URL", "").rstrip("/")
+
+def resolve_api_key():
+    """The Gemini key, or a placeholder when talking to the mock server"""
+    return os.getenv("GOOGLE_API_KEY") or (MOCK_API_KEY if llm_base_url() else None)
+
+def build_llm(tier, api_key, **kwargs):
+    """Create the CrewAI LLM for a tier (max_tokens is the answer budget; thinking is added on top)"""
+    from crewai import LLM
+    if tier.thinking_budget is not None:
+        kwargs.setdefault("thinking", {"type": "enabled", "budget_tokens": tier.thinking_budget})
+        if kwargs.get("max_tokens"):
+            kwargs["max_tokens"] += tier.thinking_budget
+    base = llm_base_url()
+    if base:
+        # LiteLLM's gemini provider posts to "{api_base}:generateContent"
+        model_name = tier.model.split("/", 1)[-1]
+        kwargs.setdefault("api_base", f"{base}/v1beta/models/{model_name}")
+        api_key = api_key or MOCK_API_KEY
+    return LLM(model=tier.model, temperature=tier.temperature, api_key=api_key, **kwargs)
+
+
+_router = None
+_router_lock = threading.Lock()
+
+def get_router() -> ModelRouter:
+    """Return the router shared by every caller in this process"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter(default_tiers())
+        return _router
+
+
+if __name__ == "__main__":
+    # Scripted-latency check on a virtual clock: the fast tier has one 60 s
+    # spike, then answers in 1 s. It should be back after a single cooldown.
+    class VirtualClock:
+        def __init__(self):
+            self.now = 0.0
+
+        def __call__(self):
+            return self.now
+
+        def sleep(self, seconds):
+            self.now += seconds
+
+    clock = VirtualClock()
+    tiers = [ModelTier("fast", "stub-fast", latency_slo=8), ModelTier("strong", "stub-strong", latency_slo=30)]
+    stubs = {"fast": StubModel([60.0] + [1.0] * 99, sleep=clock.sleep),
+             "strong": StubModel([3.0], sleep=clock.sleep)}
+    router = ModelRouter(tiers, clock=clock)
+    query = "What is Triphala?"
+
+    served = []
+    while clock.now < 300:
+        _, tier = router.call(query, "Herbal & Remedy Guide", lambda tier: stubs[tier.name](query))
+        served.append((clock.now, tier.name))
+        clock.sleep(5.0)   # next consultation arrives 5 s later
+
+    spike_end = served[0][0]
+    back = next(t for t, name in served[1:] if name == "fast")
+    print(f"fast tier tripped at {spike_end:.0f}s, serving again at {back:.0f}s "
+          f"({(back - spike_end) / COOLDOWN_SECONDS:.1f} cooldowns)")
+    print(f"routing: {sum(n == 'fast' for _, n in served)} fast / {sum(n == 'strong' for _, n in served)} strong")
+    assert back - spike_end <= 2 * COOLDOWN_SECONDS, "fast tier did not recover after one cooldown"
+
+    # a failing attempt is retried once on the other tier
+    stubs["fast"] = StubModel([RuntimeError("503 from fast tier")], sleep=clock.sleep)
+    attempts = []
+    _, tier = router.call(query, "Herbal & Remedy Guide", lambda tier: stubs[tier.name](query),
+                          before=lambda tier: attempts.append(tier.name))
+    print(f"after a fast-tier error the retry was served by {tier.name} (attempts: {attempts})")
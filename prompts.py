@@ -0,0 +1,238 @@
+"""
+Prompt Templates & Token Budgets
+Precompiled per-specialist prompts shared by the GUI and CLI, with a local token
+estimator and input/output budgets for the "standard" and "quick" profiles
+"""
+
+import re
+import time
+import threading
+from collections import deque
+from string import Template
+
+from model_router import normalize_specialist
+
+DEFAULT_SPECIALIST = "Prakriti & Dosha Analyst"
+PROFILES = ("standard", "quick")
+
+# ---------------------------
+# Specialist registry
+# budgets: profile -> (input token budget for the query, max_tokens for the answer)
+# ---------------------------
+SPECIALISTS = {
+    "Prakriti & Dosha Analyst": {
+        "goal": "Determine the user's Prakriti (constitution) and current Dosha imbalance (Vikriti)",
+        "backstory": "Ayurvedic expert in Tridosha theory who assesses constitution and imbalance from body, mind and lifestyle.",
+        "focus": "Assess Prakriti and Vikriti first, then give Ahara, Vihara and herb guidance that follows from it.",
+        "budgets": {"standard": (700, 900), "quick": (350, 350)},
+    },
+    "Ayurvedic Lifestyle Advisor": {
+        "goal": "Provide personalized Dinacharya (daily) and Ritucharya (seasonal) recommendations",
+        "backstory": "Ayurvedic lifestyle expert in daily (Dinacharya) and seasonal (Ritucharya) routines.",
+        "focus": "Focus on Dinacharya (waking, cleansing, exercise, sleep) and Ritucharya adjustments.",
+        "budgets": {"standard": (600, 800), "quick": (300, 300)},
+    },
+    "Herbal & Remedy Guide": {
+        "goal": "Suggest traditional Ayurvedic herbs (Dravyaguna) and practical home remedies",
+        "backstory": "Dravyaguna specialist who chooses safe herbs and spices by Rasa, Virya and Vipaka.",
+        "focus": "Focus on herbs, spices and home remedies; note Rasa, Virya and Vipaka briefly.",
+        "budgets": {"standard": (600, 700), "quick": (300, 300)},
+    },
+    "Ahara (Diet) Specialist": {
+        "goal": "Provide personalized Ahara (dietary) guidance to balance the current Dosha imbalance",
+        "backstory": "Ayurvedic nutritionist expert in Ahara, Rasa, cooking methods and food combining for Agni.",
+        "focus": "Focus on foods to favour and avoid, tastes (Rasa), cooking methods and meal timing.",
+        "budgets": {"standard": (600, 800), "quick": (300, 300)},
+    },
+    "Yoga & Pranayama Guide": {
+        "goal": "Recommend specific Yoga Asanas, Pranayama, and meditation techniques for physical and mental balance",
+        "backstory": "Yoga and Pranayama instructor who applies calming (Vata/Pitta) or stimulating (Kapha) practices therapeutically.",
+        "focus": "Focus on specific Asanas, Pranayama and meditation, with duration and timing.",
+        "budgets": {"standard": (600, 700), "quick": (300, 300)},
+    },
+    "Agni & Ama Consultant": {
+        "goal": "Analyze symptoms related to Agni (digestive fire) and Ama (toxins) and suggest cleansing measures",
+        "backstory": "Ayurvedic digestion consultant who reads the state of Agni (Manda, Tikshna, Vishama) and Ama.",
+        "focus": "Assess Agni and Ama, then suggest gentle cleansing, fasting and diet to rekindle Agni.",
+        "budgets": {"standard": (700, 900), "quick": (350, 350)},
+    },
+}
+
+# Shared instructions, written once instead of per call
+_TASK_TEMPLATE = (
+    "As the $role, answer from a traditional Ayurvedic perspective (Tridosha, Agni, Ama).\n"
+    "$focus\n"
+    "Name the likely Dosha imbalance, give actionable recommendations and explain them in "
+    "Ayurvedic terms. Be supportive; this is educational guidance, not medical advice.\n"
+    "$length_rule\n"
+    "${context}"
+    "QUERY: $query"
+)
+_LENGTH_RULES = {
+    "standard": "Use short headed sections with bullet points, at most $words words.",
+    "quick": "Reply with a few bullet points only, at most $words words.",
+}
+_EXPECTED_OUTPUT = {
+    "standard": "Structured Ayurvedic guidance with headed sections and bullet recommendations.",
+    "quick": "A brief bulleted Ayurvedic answer.",
+}
+
+class IncompleteAnswerError(RuntimeError):
+    """The model returned an empty answer or stopped at the max_tokens limit"""
+
+
+# ---------------------------
+# Token estimation (local, no tokenizer download)
+# ---------------------------
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate Gemini token count: short words are one token, long words
+    split roughly every 4 characters, punctuation/emoji count individually.
+    """
+    count = 0
+    for piece in _TOKEN_RE.findall(text or ""):
+        count += 1 + (len(piece) - 1) // 4 if piece.isalnum() else 1
+    return count
+
+def fit_to_budget(text: str, budget: int) -> str:
+    """Trim text so estimate_tokens(text) <= budget, keeping the beginning"""
+    if estimate_tokens(text) <= budget:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + " …"
+
+
+# ---------------------------
+# Compiled templates
+# ---------------------------
+class PromptTemplate:
+    """A specialist + profile prompt with everything but the query filled in"""
+
+    def __init__(self, specialist, profile, config):
+        self.specialist = specialist
+        self.profile = profile
+        self.goal = config["goal"]
+        self.backstory = config["backstory"]
+        self.input_budget, self.max_tokens = config["budgets"][profile]
+        self.expected_output = _EXPECTED_OUTPUT[profile]
+        length_rule = Template(_LENGTH_RULES[profile]).substitute(words=int(self.max_tokens * 0.7))
+        # pre-substitute the static parts once; only $context and $query remain
+        self._template = Template(Template(_TASK_TEMPLATE).safe_substitute(
+            role=specialist, focus=config["focus"], length_rule=length_rule))
+        self.fixed_tokens = estimate_tokens(self._template.safe_substitute(context="", query=""))
+
+    def render(self, query: str, context: str = "") -> str:
+        """Fill in the query (trimmed to the input budget) and optional context"""
+        query = fit_to_budget(query.strip(), self.input_budget)
+        if context:
+            context = context.strip() + "\n\n"
+        return self._template.substitute(context=context, query=query)
+
+    def request_tokens(self, prompt: str) -> int:
+        """Worst-case tokens for one call: prompt plus the full answer budget"""
+        return estimate_tokens(prompt) + self.max_tokens
+
+    def used_tokens(self, prompt: str, output) -> int:
+        """Tokens a finished call used: CrewAI's reported usage, else an estimate from the answer"""
+        reported = getattr(getattr(output, "token_usage", None), "total_tokens", 0)
+        return reported or estimate_tokens(prompt) + estimate_tokens(str(output))
+
+    def check_answer(self, output):
+        """Raise IncompleteAnswerError for an empty or cut-off answer instead of passing it on"""
+        if not str(output).strip():
+            raise IncompleteAnswerError("The model returned an empty answer; please try again.")
+        completion = getattr(getattr(output, "token_usage", None), "completion_tokens", 0)
+        if completion and completion >= self.max_tokens:
+            raise IncompleteAnswerError(
+                f"The answer was cut off at the {self.max_tokens}-token limit of the "
+                f"{self.profile} profile; try again or use the Standard profile.")
+
+
+_COMPILED = {
+    (name, profile): PromptTemplate(name, profile, cfg)
+    for name, cfg in SPECIALISTS.items()
+    for profile in PROFILES
+}
+
+def get_prompt(specialist: str, profile: str = "standard") -> PromptTemplate:
+    """Look up the precompiled template (GUI emoji names are accepted)"""
+    name = normalize_specialist(specialist)
+    if name not in SPECIALISTS:
+        name = DEFAULT_SPECIALIST
+    if profile not in PROFILES:
+        profile = "standard"
+    return _COMPILED[(name, profile)]
+
+
+# ---------------------------
+# Per-profile latency measurement
+# ---------------------------
+_latencies = {p: deque(maxlen=200) for p in PROFILES}
+_latency_lock = threading.Lock()
+
+def record_profile_latency(profile: str, seconds: float):
+    with _latency_lock:
+        _latencies.setdefault(profile, deque(maxlen=200)).append(seconds)
+
+def profile_latency_summary() -> dict:
+    """Median / p90 latency and sample count per profile"""
+    summary = {}
+    with _latency_lock:
+        for profile, samples in _latencies.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            summary[profile] = {
+                "count": len(ordered),
+                "p50": ordered[len(ordered) // 2],
+                "p90": ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))],
+            }
+    return summary
+
+def format_profile_latency(summary: dict) -> str:
+    """Side-by-side p50/p90 per profile (GUI Stats tab and CLI)"""
+    if not summary:
+        return "⏱️ Profile latency: no timed consultations this run"
+    lines = ["⏱️ Profile latency (this run):"]
+    for profile, s in summary.items():
+        lines.append(f"  • {profile:<9} p50 {s['p50']:5.1f}s   p90 {s['p90']:5.1f}s   (n={s['count']})")
+    if {"standard", "quick"} <= summary.keys():
+        saved = summary["standard"]["p50"] - summary["quick"]["p50"]
+        faster = "faster" if saved >= 0 else "slower"
+        lines.append(f"  quick is {abs(saved):.1f}s {faster} than standard at the median")
+    return "\n".join(lines)
+
+class ProfileTimer:
+    """with ProfileTimer("quick"): ...  — records the block's wall time"""
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        if exc[0] is None:
+            record_profile_latency(self.profile, self.elapsed)
+        return False
+
+
+if __name__ == "__main__":
+    # Compare prompt sizes per profile (latency per profile is on the GUI Stats tab / CLI exit)
+    sample = "I have joint pain, dry skin, and I feel anxious. My sleep is light and irregular."
+    for name in SPECIALISTS:
+        for profile in PROFILES:
+            tpl = get_prompt(name, profile)
+            prompt = tpl.render(sample)
+            print(f"{name:<28} {profile:<8} prompt≈{estimate_tokens(prompt):>4} tok  max_tokens={tpl.max_tokens}")
@@ -0,0 +1,213 @@
+"""
+Gemini Quota Scheduler
+Token-bucket rate limiting (requests/min + tokens/min) shared by the GUI, CLI and scripts
+"""
+
+import os
+import time
+import json
+import heapq
+import itertools
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+from model_router import llm_base_url
+from file_lock import file_lock
+
+# ---------------------------
+# Defaults (override via .env: GEMINI_RPM / GEMINI_TPM)
+# ---------------------------
+DEFAULT_RPM = 10
+DEFAULT_TPM = 250000
+# Against the mock server (VEDACARE_LLM_BASE_URL) the real quota does not apply:
+# a separate bucket, effectively unlimited unless VEDACARE_MOCK_RPM / _TPM are set
+MOCK_RPM = 1000000
+MOCK_TPM = 10 ** 12
+
+# Lower number = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+QUOTA_STATE_FILE = Path(".gemini_quota.json")
+MOCK_QUOTA_STATE_FILE = Path(".gemini_quota.mock.json")
+WAITER_TTL_SECONDS = 5.0    # waiters that stop polling are forgotten after this
+POLL_SECONDS = 0.25
+
+
+class QuotaTimeout(Exception):
+    """Raised when a slot could not be acquired before the timeout"""
+
+
+class QuotaScheduler:
+    """
+    Priority-ordered token bucket.
+
+    Inside a process, waiting threads are kept in a heap so only the
+    highest-priority one polls the shared bucket. Across processes the bucket
+    lives in a small JSON state file guarded by an O_EXCL lock file; each
+    process registers its head waiter there so an interactive consultation in
+    the GUI is served before a batch script's request.
+    """
+
+    def __init__(self, requests_per_minute=DEFAULT_RPM, tokens_per_minute=DEFAULT_TPM,
+                 state_file=QUOTA_STATE_FILE):
+        self.rpm = max(1, int(requests_per_minute))
+        self.tpm = max(1, int(tokens_per_minute))
+        self.state_file = Path(state_file)
+        self.lock_file = self.state_file.with_suffix(".lock")
+        self._waiter_id = str(os.getpid())
+        self._cond = threading.Condition()
+        self._queue = []  # heap of (priority, seq, enqueued_at)
+        self._seq = itertools.count()
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+    def acquire(self, tokens=0, priority=PRIORITY_BATCH, timeout=None):
+        """Block until one request and `tokens` tokens are available. Returns seconds waited."""
+        # a single request larger than the whole bucket would otherwise wait forever
+        tokens = min(max(0, int(tokens)), self.tpm)
+        start = time.monotonic()
+        ticket = (priority, next(self._seq), time.time())
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            self._cond.notify_all()
+            try:
+                while True:
+                    if self._queue[0] is ticket:
+                        wait = self._try_consume(tokens, priority, ticket[2])
+                        if wait <= 0:
+                            return time.monotonic() - start
+                    else:
+                        wait = POLL_SECONDS
+                    if timeout is not None:
+                        remaining = timeout - (time.monotonic() - start)
+                        if remaining <= 0:
+                            raise QuotaTimeout(f"No Gemini quota available within {timeout:.1f}s")
+                        wait = min(wait, remaining)
+                    self._cond.wait(min(wait, 1.0))
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                if not self._queue:
+                    self._withdraw()
+                self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, tokens=0, priority=PRIORITY_BATCH, timeout=None):
+        """Context-manager form of acquire()"""
+        self.acquire(tokens, priority, timeout)
+        yield
+
+    def reconcile(self, estimated_tokens, actual_tokens):
+        """Charge (or refund) the difference once the real token usage is known"""
+        delta = int(actual_tokens) - int(estimated_tokens)
+        if delta == 0:
+            return
+        with self._file_lock():
+            state = self._refill(self._read_state(), time.time())
+            state["tokens"] = min(self.tpm, state["tokens"] - delta)
+            self._write_state(state)
+
+    def snapshot(self):
+        """Current bucket levels, mostly for status displays"""
+        with self._file_lock():
+            state = self._refill(self._read_state(), time.time())
+        return {
+            "requests_available": state["requests"],
+            "tokens_available": state["tokens"],
+            "waiters": len(state["waiters"]),
+        }
+
+    # ---------------------------
+    # Shared bucket
+    # ---------------------------
+    def _try_consume(self, tokens, priority, enqueued_at):
+        now = time.time()
+        with self._file_lock():
+            state = self._refill(self._read_state(), now)
+            waiters = state["waiters"]
+            ahead = any(
+                (w[0], w[1]) < (priority, enqueued_at)
+                for k, w in waiters.items() if k != self._waiter_id
+            )
+            if not ahead and state["requests"] >= 1 and state["tokens"] >= tokens:
+                state["requests"] -= 1
+                state["tokens"] -= tokens
+                waiters.pop(self._waiter_id, None)
+                self._write_state(state)
+                return 0.0
+            waiters[self._waiter_id] = [priority, enqueued_at, now]
+            self._write_state(state)
+        if ahead:
+            return POLL_SECONDS
+        need_req = (1 - state["requests"]) * 60.0 / self.rpm
+        need_tok = (tokens - state["tokens"]) * 60.0 / self.tpm
+        return max(need_req, need_tok, POLL_SECONDS)
+
+    def _withdraw(self):
+        try:
+            with self._file_lock():
+                state = self._read_state()
+                if state["waiters"].pop(self._waiter_id, None) is not None:
+                    self._write_state(state)
+        except OSError:
+            pass
+
+    def _refill(self, state, now):
+        elapsed = max(0.0, now - state["updated"])
+        state["requests"] = min(self.rpm, state["requests"] + elapsed * self.rpm / 60.0)
+        state["tokens"] = min(self.tpm, state["tokens"] + elapsed * self.tpm / 60.0)
+        state["updated"] = now
+        state["waiters"] = {
+            k: w for k, w in state["waiters"].items() if now - w[2] < WAITER_TTL_SECONDS
+        }
+        return state
+
+    def _read_state(self):
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            state.setdefault("waiters", {})
+            return state
+        except Exception:
+            return {"requests": float(self.rpm), "tokens": float(self.tpm),
+                    "updated": time.time(), "waiters": {}}
+
+    def _write_state(self, state):
+        tmp = self.state_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_file)
+
+    def _file_lock(self):
+        return file_lock(self.lock_file)
+
+
+# ---------------------------
+# Process-wide shared scheduler
+# ---------------------------
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> QuotaScheduler:
+    """Return the scheduler shared by every caller in this process"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            # read lazily so values from .env (loaded by the apps) apply
+            if llm_base_url():
+                _scheduler = QuotaScheduler(int(os.getenv("VEDACARE_MOCK_RPM", MOCK_RPM)),
+                                            int(os.getenv("VEDACARE_MOCK_TPM", MOCK_TPM)),
+                                            state_file=MOCK_QUOTA_STATE_FILE)
+            else:
+                _scheduler = QuotaScheduler(int(os.getenv("GEMINI_RPM", DEFAULT_RPM)),
+                                            int(os.getenv("GEMINI_TPM", DEFAULT_TPM)))
+        return _scheduler
+
+
+def format_snapshot(snap: dict) -> str:
+    """Plain-text rendering used by the GUI Stats tab"""
+    return (f"🪣 Gemini quota: {snap['requests_available']:.1f} requests, "
+            f"{snap['tokens_available']:,.0f} tokens available, {snap['waiters']} waiting process(es)")
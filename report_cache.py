@@ -0,0 +1,156 @@
+"""
+Report Cache
+PDF / Markdown artifacts are rendered in a background worker as soon as a consultation
+finishes and kept in a small content-addressed cache, so an export is a file copy
+"""
+
+import os
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+CACHE_DIR = Path(".report_cache")
+MAX_ENTRIES = 8          # artifacts kept on disk (oldest evicted first)
+
+
+def artifact_key(*parts) -> str:
+    """Content address for an artifact: a hash of everything that shapes its bytes"""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:24]
+
+
+class ReportCache:
+    """
+    Speculative renderer + cache.
+
+        cache.retain([key])                      # drop what the new result made obsolete
+        cache.submit(key, ".pdf", render)        # render(path) runs in the background
+        cache.export(key, ".pdf", dest, render)  # copy; waits for / falls back to render
+
+    `render` writes the artifact to the path it is given. Files are written
+    under a temporary name and renamed, so a half-written artifact is never
+    copied.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_entries=MAX_ENTRIES):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-render")
+        self._pending = {}
+        self._wanted = None     # keys passed to the last retain(); None = everything
+        self._lock = threading.Lock()
+        self.prerendered = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def path(self, key, suffix) -> Path:
+        return self.directory / f"{key}{suffix}"
+
+    # ---------------------------
+    # Rendering
+    # ---------------------------
+    def _render(self, key, suffix, render, speculative=False):
+        target = self.path(key, suffix)
+        if target.exists():
+            return target
+        self.directory.mkdir(exist_ok=True)
+        tmp = target.with_name(f"{target.name}.{threading.get_ident()}.tmp")
+        try:
+            render(str(tmp))
+            with self._lock:
+                # retain() cannot interrupt a running render; drop it if it went stale meanwhile
+                if speculative and self._wanted is not None and key not in self._wanted:
+                    return None
+            os.replace(tmp, target)
+        finally:
+            tmp.unlink(missing_ok=True)
+        self._trim()
+        return target
+
+    def submit(self, key, suffix, render):
+        """Start rendering in the background unless it is cached or already queued"""
+        name = key + suffix
+        with self._lock:
+            if name in self._pending or self.path(key, suffix).exists():
+                return
+            def job():
+                try:
+                    if self._render(key, suffix, render, speculative=True) is not None:
+                        with self._lock:
+                            self.prerendered += 1
+                finally:
+                    with self._lock:
+                        self._pending.pop(name, None)
+            self._pending[name] = self._pool.submit(job)
+
+    def export(self, key, suffix, dest, render, timeout=30):
+        """Copy the artifact to dest, waiting for a queued render or rendering inline"""
+        with self._lock:
+            pending = self._pending.get(key + suffix)
+        if pending is not None:
+            try:
+                pending.result(timeout)
+            except Exception:
+                pass  # rendered again below, so the caller sees the real error
+        target = self.path(key, suffix)
+        hit = target.exists()
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if not hit:
+            target = self._render(key, suffix, render)
+        shutil.copyfile(target, dest)
+        return dest
+
+    # ---------------------------
+    # Eviction
+    # ---------------------------
+    def retain(self, keys):
+        """Evict every artifact (cached or queued) whose key is not in `keys`"""
+        keep = set(keys)
+        with self._lock:
+            self._wanted = keep
+            for name, future in list(self._pending.items()):
+                if name.split(".", 1)[0] not in keep and future.cancel():
+                    del self._pending[name]
+        if not self.directory.exists():
+            return
+        for f in self.directory.iterdir():
+            if f.name.split(".", 1)[0] not in keep and not f.name.endswith(".tmp"):
+                self._evict(f)
+
+    def _trim(self):
+        files = []
+        for f in self.directory.iterdir():
+            if f.name.endswith(".tmp"):
+                continue
+            try:
+                files.append((f.stat().st_mtime, f))
+            except OSError:
+                pass
+        files.sort()
+        for _, f in files[:max(0, len(files) - self.max_entries)]:
+            self._evict(f)
+
+    def _evict(self, f):
+        try:
+            f.unlink()
+            self.evicted += 1
+        except OSError:
+            pass  # e.g. being copied right now; the next retain() gets it
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"prerendered": self.prerendered, "export_hits": self.hits,
+                    "export_misses": self.misses, "evicted": self.evicted, "queued": len(self._pending)}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
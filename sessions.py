@@ -0,0 +1,115 @@
+"""
+Consultation Sessions
+Multi-turn state with a rolling summary so follow-up prompts stay under a fixed token budget
+"""
+
+import re
+import json
+import os
+import uuid
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from prompts import estimate_tokens, fit_to_budget
+
+SESSIONS_FILE = Path("consult_sessions.json")
+CONTEXT_BUDGET = 450    # tokens of earlier conversation sent with a follow-up
+SUMMARY_BUDGET = 200    # share of that budget the rolling summary may use
+MAX_SESSIONS = 50
+
+# Sentences mentioning these survive summarisation
+_KEY_TERMS = re.compile(
+    r"\b(vata|pitta|kapha|dosha|vikriti|prakriti|agni|ama|imbalance|avoid|favou?r|recommend)\w*",
+    re.IGNORECASE,
+)
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def _gist(text: str, max_sentences: int = 2) -> str:
+    """Extractive summary: the first sentences carrying Ayurvedic key terms"""
+    sentences = [s.replace("**", "").strip(" *#-•\t") for s in _SENTENCE_SPLIT.split(text or "")]
+    # drop the app's own banner / disclaimer lines
+    sentences = [s for s in sentences if len(s) > 12 and "Guidance from" not in s and not s.startswith("⚠️")]
+    picked = [s for s in sentences if _KEY_TERMS.search(s)][:max_sentences]
+    return " ".join(picked or sentences[:1])
+
+
+class Session:
+    """
+    A conversation with one user. Recent turns are kept verbatim; when they
+    no longer fit the context budget the oldest is folded into `summary`,
+    so the context sent with each follow-up never exceeds CONTEXT_BUDGET.
+    """
+
+    def __init__(self, session_id=None, specialist="", created=None, summary="", turns=None):
+        self.id = session_id or uuid.uuid4().hex[:12]
+        self.specialist = specialist
+        self.created = created or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.summary = summary
+        self.turns = list(turns or [])  # [{"query": ..., "answer": ...}]
+
+    @property
+    def title(self):
+        first = self.turns[0]["query"] if self.turns else "New session"
+        return f"{self.created[:16]} · {first[:30]}"
+
+    def add_turn(self, query, answer, budget=CONTEXT_BUDGET):
+        self.turns.append({"query": query, "answer": answer})
+        self._compact(budget)
+
+    def context(self, budget=CONTEXT_BUDGET) -> str:
+        """Earlier conversation formatted for the prompt (empty for a first question)"""
+        parts = []
+        if self.summary:
+            parts.append(f"Earlier in this consultation: {self.summary}")
+        for turn in self.turns:
+            parts.append(f"User asked: {turn['query']}\nYou answered: {_gist(turn['answer'], 3)}")
+        if not parts:
+            return ""
+        return fit_to_budget("PREVIOUS CONTEXT:\n" + "\n".join(parts), budget)
+
+    def _compact(self, budget):
+        while len(self.turns) > 1 and estimate_tokens(self.context(budget * 10)) > budget:
+            oldest = self.turns.pop(0)
+            folded = f"{self.summary} Asked about {oldest['query'][:80]}; {_gist(oldest['answer'])}".strip()
+            # keep the newest part of the summary when it outgrows its share
+            while estimate_tokens(folded) > SUMMARY_BUDGET and ". " in folded:
+                folded = folded.split(". ", 1)[1]
+            self.summary = fit_to_budget(folded, SUMMARY_BUDGET)
+
+    def to_dict(self):
+        return {"id": self.id, "specialist": self.specialist, "created": self.created,
+                "summary": self.summary, "turns": self.turns}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("id"), data.get("specialist", ""), data.get("created"),
+                   data.get("summary", ""), data.get("turns"))
+
+
+# ---------------------------
+# Persistence (local JSON, newest first)
+# ---------------------------
+_store_lock = threading.Lock()
+
+def load_sessions():
+    if SESSIONS_FILE.exists():
+        try:
+            with open(SESSIONS_FILE, "r", encoding="utf-8") as f:
+                return [Session.from_dict(d) for d in json.load(f)]
+        except Exception:
+            return []
+    return []
+
+def save_session(session: Session):
+    with _store_lock:
+        sessions = [s for s in load_sessions() if s.id != session.id]
+        sessions.insert(0, session)
+        tmp = SESSIONS_FILE.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump([s.to_dict() for s in sessions[:MAX_SESSIONS]], f, ensure_ascii=False, indent=2)
+        os.replace(tmp, SESSIONS_FILE)
+
+def get_session(session_id):
+    return next((s for s in load_sessions() if s.id == session_id), None)
@@ -0,0 +1,343 @@
+"""
+Singleflight
+Identical consultations that arrive while one is already running attach to that call
+instead of starting their own; every caller gets the same result (or the same error).
+Works across threads and across processes (GUI windows, CLI sessions, batch scripts)
+that share the working directory
+"""
+
+import os
+import re
+import json
+import time
+import atexit
+import uuid
+import hashlib
+import threading
+from pathlib import Path
+
+from model_router import normalize_specialist
+
+_SPACE_RE = re.compile(r"\s+")
+
+INFLIGHT_DIR = Path(".singleflight")
+HEARTBEAT_SECONDS = 1.0       # the leader touches its claim this often while it runs
+LEADER_STALE_SECONDS = 5.0     # a claim not touched for this long belongs to a closed window
+RESULT_LINGER_SECONDS = 3.0    # results (patient text) are deleted once pollers have had this long
+POLL_SECONDS = 0.1
+
+
+class SharedCallError(RuntimeError):
+    """The identical consultation failed in the process that ran it"""
+
+
+def consultation_key(specialist, query, profile="standard", context=""):
+    """
+    Key for "the same consultation": specialist (emoji prefix ignored), query
+    case- and whitespace-folded, the response profile and the retrieved /
+    session context, since a follow-up in a session is a different prompt.
+    """
+    text = _SPACE_RE.sub(" ", query).strip().casefold()
+    digest = hashlib.sha1(context.encode("utf-8")).hexdigest()[:16] if context else ""
+    return (normalize_specialist(specialist), text, profile, digest)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Request coalescing (one per process, shared by every driver).
+
+        result, shared = get_singleflight().do(key, lambda: str(crew.kickoff()))
+
+    The first caller for a key runs fn; callers arriving before it finishes
+    block and receive its outcome. Nothing is cached: once the call returns
+    the next request with that key runs again.
+
+    Threads of one process meet on an in-memory table. Across processes the
+    leader claims the key with an O_EXCL lock file in `directory` and leaves
+    its outcome in a result file that the other processes poll, so fn must
+    return something JSON-serialisable (a result that is not is simply not
+    shared; the other processes then run the call themselves). Pass
+    directory=None for in-process coalescing only.
+    """
+
+    def __init__(self, directory=INFLIGHT_DIR):
+        self.directory = Path(directory) if directory is not None else None
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.requests = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.remote = 0
+        self.errors = 0
+        self.max_waiters = 0
+        self._published = {}   # result file -> token, deleted after RESULT_LINGER_SECONDS
+        atexit.register(self._discard_results)
+
+    def do(self, key, fn, timeout=None):
+        """Return (result, shared); shared is True when another caller did the work"""
+        with self._lock:
+            self.requests += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError("Timed out waiting for an identical consultation in flight")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        remote = False
+        try:
+            call.result, remote = self._run_exclusive(key, fn, timeout)
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, remote
+
+    # ---------------------------
+    # Cross-process coalescing
+    # ---------------------------
+    def _run_exclusive(self, key, fn, timeout):
+        """Run fn unless another process is already running this key; returns (result, remote)"""
+        if self.directory is None:
+            return self._execute(fn), False
+        self.directory.mkdir(exist_ok=True)
+        self._sweep()
+        name = hashlib.sha1(json.dumps(key, ensure_ascii=False).encode("utf-8")).hexdigest()[:24]
+        claim = self.directory / f"{name}.lock"
+        outcome = self.directory / f"{name}.json"
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            token = uuid.uuid4().hex
+            try:
+                fd = os.open(claim, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                done, result = self._follow(claim, outcome, deadline)
+                if done:
+                    with self._lock:
+                        self.coalesced += 1
+                        self.remote += 1
+                    return result, True
+                continue   # the leader went away without a result: claim it ourselves
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"token": token}, f)
+            stop = threading.Event()
+            threading.Thread(target=self._heartbeat, args=(claim, stop), daemon=True,
+                             name="singleflight-heartbeat").start()
+            try:
+                result = self._execute(fn)
+            except Exception as e:
+                self._publish(outcome, {"token": token, "error": f"{type(e).__name__}: {e}"})
+                raise
+            else:
+                self._publish(outcome, {"token": token, "result": result})
+                return result, False
+            finally:
+                stop.set()
+                try:
+                    os.unlink(claim)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _heartbeat(claim, stop):
+        # a window closed mid-consultation stops touching its claim, so followers
+        # take over after LEADER_STALE_SECONDS instead of waiting on it
+        while not stop.wait(HEARTBEAT_SECONDS):
+            try:
+                os.utime(claim)
+            except OSError:
+                return
+
+    def _execute(self, fn):
+        with self._lock:
+            self.executed += 1
+        return fn()
+
+    def _follow(self, claim, outcome, deadline):
+        """Wait on another process's claim; returns (True, result) or (False, None) if it vanished"""
+        token = None
+        while True:
+            try:
+                if time.time() - os.path.getmtime(claim) > LEADER_STALE_SECONDS:
+                    os.unlink(claim)
+                    return False, None
+                with open(claim, "r", encoding="utf-8") as f:
+                    token = json.load(f)["token"]
+            except FileNotFoundError:
+                # finished (or crashed) since we last looked; its result may be there
+                return self._collect(outcome, token)
+            except (OSError, ValueError, KeyError):
+                pass   # claim created but not written yet
+            if token is not None:
+                done, result = self._collect(outcome, token)
+                if done:
+                    return done, result
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("Timed out waiting for an identical consultation in another process")
+            time.sleep(POLL_SECONDS)
+
+    @staticmethod
+    def _collect(outcome, token):
+        if token is None:
+            return False, None
+        try:
+            with open(outcome, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return False, None
+        if payload.get("token") != token:
+            return False, None
+        if "error" in payload:
+            raise SharedCallError(payload["error"])
+        return True, payload["result"]
+
+    def _publish(self, outcome, payload):
+        try:
+            data = json.dumps(payload, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return   # not shareable: followers find no result and run the call themselves
+        tmp = outcome.with_name(f"{outcome.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, outcome)
+        with self._lock:
+            self._published[outcome] = payload["token"]
+        timer = threading.Timer(RESULT_LINGER_SECONDS, self._discard_results, args=(outcome,))
+        timer.daemon = True
+        timer.start()
+
+    def _discard_results(self, only=None):
+        """Delete result files this process published (all of them at exit)"""
+        with self._lock:
+            targets = [only] if only is not None else list(self._published)
+            tokens = {t: self._published.pop(t, None) for t in targets}
+        for outcome, token in tokens.items():
+            try:
+                with open(outcome, "r", encoding="utf-8") as f:
+                    if json.load(f).get("token") != token:
+                        continue   # a newer leader's result for the same key
+                os.unlink(outcome)
+            except (OSError, ValueError):
+                pass
+
+    def _sweep(self):
+        """Delete results left behind by processes that exited before their timer fired"""
+        now = time.time()
+        for f in self.directory.glob("*.json"):
+            try:
+                if now - f.stat().st_mtime > RESULT_LINGER_SECONDS:
+                    f.unlink()
+            except OSError:
+                pass
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def snapshot(self) -> dict:
+        """Counters for status displays; `coalesced` is the number of LLM calls saved"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "llm_calls": self.executed,
+                "coalesced": self.coalesced,
+                "from_other_processes": self.remote,
+                "saved_pct": 100 * self.coalesced / self.requests if self.requests else 0.0,
+                "errors": self.errors,
+                "in_flight": len(self._calls),
+                "max_waiters": self.max_waiters,
+            }
+
+
+def format_snapshot(snap: dict) -> str:
+    """Plain-text rendering used by the GUI Stats tab"""
+    return (f"🔗 Coalescing: {snap['requests']} requests, {snap['llm_calls']} LLM calls, "
+            f"{snap['coalesced']} saved ({snap['saved_pct']:.0f}%, {snap['from_other_processes']} via other windows), "
+            f"{snap['in_flight']} in flight")
+
+
+_flight = None
+_flight_lock = threading.Lock()
+
+def get_singleflight() -> SingleFlight:
+    """Return the coalescing layer shared by the GUI, CLI and batch drivers"""
+    global _flight
+    with _flight_lock:
+        if _flight is None:
+            _flight = SingleFlight()
+        return _flight
+
+
+def _demo_process(directory, query, queue):
+    flight = SingleFlight(directory)
+
+    def slow_llm():
+        time.sleep(1.0)
+        return "guidance"
+
+    queue.put(flight.do(consultation_key("🧬 Prakriti & Dosha Analyst", query), slow_llm))
+
+
+if __name__ == "__main__":
+    import tempfile
+    import multiprocessing
+    from concurrent.futures import ThreadPoolExecutor
+
+    intake = "Joint pain, dry skin and light sleep.   Feel anxious in the evenings."
+    variants = [intake, intake.upper(), "  " + intake.replace(" ", "\n", 3)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flight = SingleFlight(tmp)
+
+        def slow_llm():
+            time.sleep(0.5)
+            return "guidance"
+
+        def submit(i):
+            key = consultation_key("🧬 Prakriti & Dosha Analyst", variants[i % len(variants)])
+            return flight.do(key, slow_llm)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            results = list(pool.map(submit, range(12)))
+        print(f"12 identical submissions (threads) in {time.perf_counter() - start:.2f}s, "
+              f"{sum(shared for _, shared in results)} shared")
+        print(flight.snapshot())
+
+        # the same consultation from four separate processes (e.g. four GUI windows)
+        queue = multiprocessing.Queue()
+        start = time.perf_counter()
+        procs = [multiprocessing.Process(target=_demo_process, args=(tmp, variants[i % len(variants)], queue))
+                 for i in range(4)]
+        for proc in procs:
+            proc.start()
+        results = [queue.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+        print(f"4 identical submissions (processes) in {time.perf_counter() - start:.2f}s, "
+              f"{sum(shared for _, shared in results)} shared")
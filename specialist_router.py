@@ -0,0 +1,294 @@
+"""
+Specialist Auto-Router
+Tiny CPU-only classifier (hashed n-grams + softmax linear model) that picks the best
+specialist for a query, trained incrementally from consult_history.json
+"""
+
+import re
+import json
+import math
+import os
+import zlib
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from model_router import normalize_specialist
+from prompts import SPECIALISTS
+from history_store import load_history, HISTORY_FILE
+from file_lock import file_lock
+
+AUTO_SPECIALIST = "Auto"
+MODEL_FILE = Path("specialist_model.json")
+MODEL_LOCK_FILE = MODEL_FILE.with_suffix(".lock")
+
+N_FEATURES = 1 << 18
+LEARNING_RATE = 0.4
+SEED_EPOCHS = 8
+RERUN_WINDOW_SECONDS = 600   # a label is only learned once its query hasn't been re-run for this long
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# A few starter queries per specialist so the model is useful before any history exists
+SEED_QUERIES = {
+    "Prakriti & Dosha Analyst": [
+        "what is my dosha", "what is my prakriti body type constitution",
+        "i am thin, get cold easily and my skin is dry", "which dosha is imbalanced in me",
+    ],
+    "Ayurvedic Lifestyle Advisor": [
+        "what daily routine should i follow", "best time to wake up and sleep",
+        "how should i change my routine in winter", "morning routine oil massage tongue scraping",
+    ],
+    "Herbal & Remedy Guide": [
+        "which herbs help with anxiety", "home remedy for cough and cold",
+        "is ashwagandha good for me", "herbal remedy for dull skin and acne",
+    ],
+    "Ahara (Diet) Specialist": [
+        "what should i eat for breakfast", "which foods should i avoid",
+        "diet plan for weight loss", "what foods cool the body in summer",
+    ],
+    "Yoga & Pranayama Guide": [
+        "which yoga poses help back pain", "breathing exercise for stress",
+        "pranayama for better sleep", "asanas for flexibility and energy",
+    ],
+    "Agni & Ama Consultant": [
+        "i feel bloated after meals", "my digestion is weak and appetite low",
+        "coated tongue and constipation", "acidity and heartburn after eating",
+    ],
+}
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def features(text: str) -> dict:
+    """Hashed word unigrams, bigrams and character trigrams (L2-normalised)"""
+    words = _WORD_RE.findall(text.lower())
+    grams = ["w:" + w for w in words]
+    grams += ["b:" + a + "_" + b for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"^{w}$"
+        grams += ["c:" + padded[i:i + 3] for i in range(len(padded) - 2)]
+    x = {}
+    for g in grams:
+        h = zlib.crc32(g.encode()) % N_FEATURES  # stable across runs, unlike hash()
+        x[h] = x.get(h, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in x.values())) or 1.0
+    return {k: v / norm for k, v in x.items()}
+
+
+class SpecialistRouter:
+    """Multinomial logistic regression over hashed features, trained online"""
+
+    def __init__(self, classes=tuple(SPECIALISTS)):
+        self.classes = list(classes)
+        self.weights = {c: {} for c in self.classes}
+        self.bias = {c: 0.0 for c in self.classes}
+        # history position already seen: (timestamp, entries seen with that timestamp)
+        self.cursor = ("", 0)
+        # normalized query -> latest entry, waiting out RERUN_WINDOW_SECONDS
+        self.pending = {}
+        self.examples = 0
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # Inference
+    # ---------------------------
+    def _scores(self, x):
+        return {
+            c: self.bias[c] + sum(self.weights[c].get(k, 0.0) * v for k, v in x.items())
+            for c in self.classes
+        }
+
+    def predict_proba(self, query: str) -> dict:
+        scores = self._scores(features(query))
+        top = max(scores.values())
+        exps = {c: math.exp(s - top) for c, s in scores.items()}
+        total = sum(exps.values())
+        return {c: e / total for c, e in exps.items()}
+
+    def predict(self, query: str) -> str:
+        scores = self._scores(features(query))
+        return max(self.classes, key=lambda c: scores[c])
+
+    # ---------------------------
+    # Training
+    # ---------------------------
+    def partial_fit(self, query: str, specialist: str, lr=LEARNING_RATE):
+        """One SGD step of softmax cross-entropy towards `specialist`"""
+        label = normalize_specialist(specialist)
+        if label not in self.weights or not query.strip():
+            return
+        x = features(query)
+        with self._lock:
+            scores = self._scores(x)
+            top = max(scores.values())
+            exps = {c: math.exp(s - top) for c, s in scores.items()}
+            total = sum(exps.values())
+            for c in self.classes:
+                grad = exps[c] / total - (1.0 if c == label else 0.0)
+                if abs(grad) < 1e-6:
+                    continue
+                w = self.weights[c]
+                for k, v in x.items():
+                    w[k] = w.get(k, 0.0) - lr * grad * v
+                self.bias[c] -= lr * grad * 0.1
+            self.examples += 1
+
+    def seed(self):
+        for name in SEED_QUERIES:
+            self.partial_fit(SPECIALISTS[name]["goal"] + ". " + SPECIALISTS[name]["focus"], name)
+        for _ in range(SEED_EPOCHS):
+            for name, queries in SEED_QUERIES.items():
+                for q in queries:
+                    self.partial_fit(q, name)
+
+    def observe(self, entry: dict):
+        """
+        Queue a new history entry for training. The label is held back: if
+        the same query is re-run with another specialist within
+        RERUN_WINDOW_SECONDS, only the later choice (the one the user
+        settled on) is ever learned. Entries the router picked itself are
+        skipped so it never trains on its own guesses.
+        """
+        ts = entry.get("timestamp", "")
+        cur_ts, cur_n = self.cursor
+        if ts > cur_ts:
+            self.cursor = (ts, 1)
+        elif ts == cur_ts:
+            self.cursor = (ts, cur_n + 1)
+        if entry.get("auto_routed"):
+            return
+        key = " ".join(entry.get("query", "").lower().split())
+        if not key:
+            return
+        self.pending.pop(key, None)   # re-inserted last, so pending stays in time order
+        self.pending[key] = {"timestamp": ts, "query": entry.get("query", ""),
+                             "specialist": entry.get("specialist", "")}
+
+    def settle(self, now=None) -> int:
+        """Train on pending labels whose re-run window has passed"""
+        cutoff = ((now or datetime.now()) - timedelta(seconds=RERUN_WINDOW_SECONDS)).strftime(TIMESTAMP_FORMAT)
+        trained = 0
+        for key, e in list(self.pending.items()):
+            if e["timestamp"] > cutoff:
+                break
+            self.partial_fit(e["query"], e["specialist"])
+            del self.pending[key]
+            trained += 1
+        return trained
+
+    def update_from_history(self, entries) -> int:
+        """
+        Catch up on history entries (newest first, as stored) not seen yet.
+        The cursor counts entries per timestamp, so two consultations logged
+        in the same second are both picked up.
+        """
+        chronological = sorted(reversed(list(entries)), key=lambda e: e.get("timestamp", ""))
+        cur_ts, cur_n = self.cursor
+        seen_same = 0
+        fresh = 0
+        for e in chronological:
+            ts = e.get("timestamp", "")
+            if ts < cur_ts:
+                continue
+            if ts == cur_ts and seen_same < cur_n:
+                seen_same += 1
+                continue
+            self.observe(e)
+            fresh += 1
+        return fresh
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def save(self, path=MODEL_FILE):
+        data = {
+            "classes": self.classes,
+            "bias": self.bias,
+            "weights": {c: {str(k): round(v, 5) for k, v in w.items() if abs(v) > 1e-5}
+                        for c, w in self.weights.items()},
+            "cursor": list(self.cursor),
+            "pending": list(self.pending.values()),
+            "examples": self.examples,
+        }
+        tmp = Path(path).with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=MODEL_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        router = cls(data["classes"])
+        router.bias = data["bias"]
+        router.weights = {c: {int(k): v for k, v in w.items()} for c, w in data["weights"].items()}
+        router.cursor = tuple(data.get("cursor", ("", 0)))
+        for e in data.get("pending", []):
+            router.pending[" ".join(e["query"].lower().split())] = e
+        router.examples = data.get("examples", 0)
+        return router
+
+
+# ---------------------------
+# Shared instance (the model file is the source of truth: every window
+# reloads it when another one has saved, and updates it under a file lock)
+# ---------------------------
+_router = None
+_router_signature = None
+_router_lock = threading.Lock()
+
+def _read_history():
+    # compact records: only query/specialist/timestamp are read, never the results
+    return load_history(HISTORY_FILE)
+
+def _signature():
+    try:
+        st = os.stat(MODEL_FILE)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def _reload_if_changed():
+    """Caller holds _router_lock; picks up what other processes saved"""
+    global _router, _router_signature
+    signature = _signature()
+    if signature is not None and signature != _router_signature:
+        try:
+            _router, _router_signature = SpecialistRouter.load(), signature
+        except Exception:
+            pass   # half-written by an older version: keep the copy we have
+
+def _save():
+    global _router_signature
+    _router.save()
+    _router_signature = _signature()
+
+def get_specialist_router() -> SpecialistRouter:
+    """Load (or seed) the model and catch up on any new history entries"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            with file_lock(MODEL_LOCK_FILE):
+                _reload_if_changed()
+                if _router is None:
+                    _router = SpecialistRouter()
+                    _router.seed()
+                changed = _router.update_from_history(_read_history())
+                if _router.settle() or changed or not MODEL_FILE.exists():
+                    _save()
+        else:
+            _reload_if_changed()
+        return _router
+
+def learn_from_entry(entry: dict):
+    """Incremental update after a consultation has been appended to history"""
+    get_specialist_router()
+    with _router_lock, file_lock(MODEL_LOCK_FILE):
+        _reload_if_changed()
+        _router.observe(entry)
+        _router.settle()
+        _save()
+
+def route_query(query: str) -> str:
+    """Best specialist (plain name, no emoji) for a query"""
+    return get_specialist_router().predict(query)